@@ -1,15 +1,33 @@
 from flask import Flask, request, jsonify
-import os, pytesseract
+import os
+import logging
 from flask_cors import CORS
 from src.routes import bp
+from src import warmup
+from src.uploads import MAX_UPLOAD_BYTES, SpooledRequest
+
+# Leveled logging instead of print; LOG_LEVEL=DEBUG shows parsed bill text
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+)
 
 app = Flask(__name__)
+app.request_class = SpooledRequest
 CORS(app, resources={r"/*": {"origins": "*"}}, supports_credentials=True)
 
-cmd = os.getenv("TESSERACT_CMD")
-pytesseract.pytesseract.tesseract_cmd = cmd
+# Reject oversized requests before they are read (small allowance for form fields)
+app.config["MAX_CONTENT_LENGTH"] = MAX_UPLOAD_BYTES + 64 * 1024
 
 app.register_blueprint(bp)
 
+# Models and clients are warmed by the entry points, not on import, so
+# scripts, benchmarks and multiprocessing children importing `app` stay cheap.
+# serve.py warms the gunicorn master before fork; PRELOAD_MODELS=0 skips it
+# for fast cold starts (heavy libraries then load on the first request that
+# needs them, and /ready warms up in the background).
 if __name__ == "__main__":
+    # The debug reloader runs this block in a watcher process too; only the child serves
+    if os.getenv("PRELOAD_MODELS", "1") == "1" and os.getenv("WERKZEUG_RUN_MAIN") == "true":
+        warmup.warm_up()
     app.run(debug=True)
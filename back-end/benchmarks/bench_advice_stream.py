@@ -0,0 +1,75 @@
+"""
+Time-to-first-tip for /advice (blocking) vs /advice/stream (SSE), both served
+by a local fake LLM that takes --latency seconds to produce the whole answer.
+The stream also reports when its rule-based `local` preview arrived.
+
+Run from back-end/:
+    python -m benchmarks.bench_advice_stream --latency 3 --runs 5
+"""
+import argparse
+import os
+import statistics
+import time
+
+os.environ.setdefault("PRELOAD_MODELS", "0")  # nothing to warm: no models involved
+
+from app import app
+from src import gemini
+from src.advice_cache import advice_service
+from src.fake_llm import FakeGenerativeModel
+
+BILL = {"bill_type": "TOU", "Peak_kWh": 180, "MidPeak_kWh": 170, "OffPeak_kWh": 500, "Total_Cost": 125.0}
+
+
+def blocking(client, bill):
+    start = time.perf_counter()
+    resp = client.post("/advice", json=bill)
+    assert resp.status_code == 200 and "tips" in resp.get_json()["advice"], resp.get_data()[:300]
+    total = time.perf_counter() - start
+    return None, total, total  # nothing is visible until the whole answer is back
+
+
+def streaming(client, bill):
+    start = time.perf_counter()
+    resp = client.post("/advice/stream", json=bill, buffered=False)
+    first_tip = local = None
+    events = []
+    for chunk in resp.response:
+        text = chunk.decode() if isinstance(chunk, bytes) else chunk
+        for line in text.splitlines():
+            if line.startswith("event: "):
+                events.append(line[7:])
+                if line == "event: local" and local is None:
+                    local = time.perf_counter() - start
+                if line == "event: tip" and first_tip is None:
+                    first_tip = time.perf_counter() - start
+    resp.close()
+    assert events[-1] == "done", events
+    return local, first_tip, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=3.0, help="fake LLM time for the full answer (s)")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    gemini.set_client(FakeGenerativeModel(latency=args.latency))
+    client = app.test_client()
+
+    for label, fn in [("blocking /advice", blocking), ("/advice/stream", streaming)]:
+        locals_, firsts, totals = [], [], []
+        for run in range(args.runs):
+            advice_service.cache.clear()  # every run goes to the (fake) LLM
+            local, first, total = fn(client, dict(BILL, id=run))
+            locals_.append(local)
+            firsts.append(first)
+            totals.append(total)
+        preview = (f"local preview {statistics.median(locals_) * 1000:6.1f} ms | "
+                   if locals_[0] is not None else " " * 30)
+        print(f"{label:18} {preview}first LLM tip {statistics.median(firsts) * 1000:7.0f} ms | "
+              f"complete {statistics.median(totals) * 1000:7.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
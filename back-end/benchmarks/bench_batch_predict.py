@@ -0,0 +1,58 @@
+"""
+Rows/sec for per-row ML predictions vs the grouped batch path.
+
+Run from back-end/:
+    python -m benchmarks.bench_batch_predict --rows 20000
+"""
+import argparse
+import os
+import time
+
+import pandas as pd
+
+from src.ML_model.callthemodel import (
+    BILLING_TYPE_MODELS, predict_batch, predict_tiered_bill, predict_tou_bill, predict_ulo_bill,
+)
+from src.ML_model.registry import base_dir, registry
+
+TRAINING_FILES = ["TOU_HTV.txt", "Tiered_HTV.txt", "ULO_HTV.txt"]
+SINGLE_ROW = {"TOU": predict_tou_bill, "Tiered": predict_tiered_bill, "ULO": predict_ulo_bill}
+
+
+def _portfolio(n_rows):
+    # Mixed TOU/Tiered/ULO rows sampled from the training data
+    frames = [pd.read_csv(os.path.join(base_dir, f)).drop(columns=["Total_Bill"])
+              for f in TRAINING_FILES]
+    df = pd.concat(frames, ignore_index=True)
+    return df.sample(n=n_rows, replace=True, random_state=0).reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--single-rows", type=int, default=500,
+                        help="rows scored one at a time (the slow path is sampled)")
+    args = parser.parse_args()
+
+    registry.preload()
+    df = _portfolio(args.rows)
+
+    # One dict per row in its own model's column order, as the per-request path receives it
+    features = {bt: registry.get_named(name).feature_names_ for bt, name in BILLING_TYPE_MODELS.items()}
+    records = [{f: (row[f] if row[f] == row[f] else 0) for f in features[row["Billing_Type"]]}
+               for row in df.head(args.single_rows).to_dict("records")]
+    start = time.perf_counter()
+    for row in records:
+        SINGLE_ROW[row["Billing_Type"]](row)
+    single_rps = len(records) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    predict_batch(df)
+    batch_rps = len(df) / (time.perf_counter() - start)
+
+    print(f"single-row  {single_rps:12.1f} rows/sec")
+    print(f"batch       {batch_rps:12.1f} rows/sec  ({batch_rps / single_rps:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Per-call latency of single-row predictions: the DataFrame path (predict_bill)
+vs model.CompactPredictor (plain-list Pool, no pandas). Also checks that both
+paths return identical values for every sampled row.
+
+Run from back-end/:
+    python -m benchmarks.bench_compact_predict --rows 300
+"""
+import argparse
+import os
+import time
+
+import pandas as pd
+
+from src.ML_model.callthemodel import cat_features
+from src.ML_model.model import compact_predictor, predict_bill
+from src.ML_model.registry import base_dir, model_path, registry
+
+TRAINING_FILES = {"tou": "TOU_HTV.txt", "tiered": "Tiered_HTV.txt", "ulo": "ULO_HTV.txt"}
+
+
+def _time_per_call(fn, rows):
+    fn(rows[0])  # warm
+    start = time.perf_counter()
+    values = [fn(r) for r in rows]
+    return (time.perf_counter() - start) / len(rows), values
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=300, help="rows per model")
+    args = parser.parse_args()
+
+    registry.preload()
+    exit_code = 0
+    for name, training_file in TRAINING_FILES.items():
+        path = model_path(name)
+        features = registry.get(path).feature_names_
+        df = pd.read_csv(os.path.join(base_dir, training_file))[features]
+        rows = df.sample(n=args.rows, replace=True, random_state=0).to_dict("records")
+
+        frame_s, frame_values = _time_per_call(
+            lambda r: float(predict_bill(path, pd.DataFrame([r]), cat_features)[0]), rows)
+        compact = compact_predictor(path)
+        compact_s, compact_values = _time_per_call(lambda r: float(compact.predict([r])[0]), rows)
+
+        mismatches = sum(1 for a, b in zip(frame_values, compact_values) if a != b)
+        exit_code |= bool(mismatches)
+        print(f"{name:7} DataFrame {frame_s * 1e6:8.0f} us/call | compact {compact_s * 1e6:6.0f} us/call | "
+              f"{frame_s / compact_s:5.1f}x | mismatches {mismatches}/{len(rows)}")
+    return exit_code
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,99 @@
+"""
+Bill history store: inserts --households x --years of monthly bills (in
+shuffled order, with some re-uploads that replace a month), checks every
+incrementally maintained rollup against a full recompute, then times inserts
+and GET /history as the stored history grows.
+
+Run from back-end/:
+    python -m benchmarks.bench_history --households 200 --years 10
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("PRELOAD_MODELS", "0")
+os.environ["HISTORY_DB"] = os.path.join(tempfile.mkdtemp(prefix="history-bench-"), "history.sqlite3")
+
+from app import app
+from src.history import SUMS, WINDOW, HistoryStore, bill_measures, history_store, month_index, summarize
+
+from .synthetic_bills import BILL_TYPES, bill_values
+
+
+def recompute(bills):
+    """Rollup from scratch: {month: {bill_type: bill_data}} -> summarize() input."""
+    last = max(bills)
+    sums = dict.fromkeys(SUMS, 0.0)
+    for month, by_type in bills.items():
+        if month > last - WINDOW:
+            for bill_data in by_type.values():
+                for k, v in bill_measures(bill_data).items():
+                    sums[k] += v
+    count = sum(len(by_type) for by_type in bills.values())
+    return summarize({"bills": count, "first_month": min(bills), "last_month": last,
+                      "last_ml_total": None, **sums})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--households", type=int, default=200)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--replace", type=float, default=0.1, help="share of months uploaded twice")
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    store = history_store
+    assert isinstance(store, HistoryStore)
+    rng = random.Random(0)
+    start = month_index(2015, 1)
+    expected = {}
+    inserts = []
+    for h in range(args.households):
+        household = f"H{h:05d}"
+        bill_type = BILL_TYPES[h % len(BILL_TYPES)]
+        months = list(range(start, start + args.years * 12))
+        months += rng.sample(months, int(len(months) * args.replace))
+        rng.shuffle(months)
+        for i, month in enumerate(months):
+            bill = bill_values(bill_type, seed=f"{h}-{month}-{i}")
+            inserts.append((household, month, bill))
+            expected.setdefault(household, {}).setdefault(month, {})[bill_type] = bill
+
+    times = []
+    for household, month, bill in inserts:
+        t = time.perf_counter()
+        store.record(household, month, bill)
+        times.append(time.perf_counter() - t)
+    print(f"{len(inserts)} inserts: median {statistics.median(times) * 1000:.2f} ms, "
+          f"max {max(times) * 1000:.2f} ms")
+
+    mismatches = 0
+    for household, bills in expected.items():
+        got = store.rollup(household)
+        want = recompute(bills)
+        got.pop("last_ml_total"), want.pop("last_ml_total")
+        if any(abs((got[k] or 0) - (want[k] or 0)) > 1e-6 * max(1, abs(want[k] or 0))
+               if isinstance(want[k], float) else got[k] != want[k] for k in want):
+            mismatches += 1
+            if mismatches <= 3:
+                print(f"MISMATCH {household}: {got} != {want}")
+    print(f"rollups checked against a full recompute: {len(expected)} households, {mismatches} mismatches")
+
+    client = app.test_client()
+    households = list(expected)
+    times = []
+    for _ in range(args.queries):
+        t = time.perf_counter()
+        resp = client.get(f"/history?household={rng.choice(households)}")
+        times.append(time.perf_counter() - t)
+        assert resp.status_code == 200, resp.get_data()[:200]
+    print(f"GET /history ({args.years} years per household): median {statistics.median(times) * 1000:.2f} ms, "
+          f"p90 {sorted(times)[int(len(times) * 0.9)] * 1000:.2f} ms")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
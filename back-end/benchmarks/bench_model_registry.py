@@ -0,0 +1,76 @@
+"""
+Cold vs warm prediction latency for the CatBoost model registry.
+
+Run from back-end/:
+    python -m benchmarks.bench_model_registry --runs 200
+"""
+import argparse
+import statistics
+import time
+
+from catboost import CatBoostRegressor
+
+from src.ML_model.callthemodel import predict_tou_bill
+from src.ML_model.registry import model_path, registry
+
+SAMPLE_TOU = {
+    "Billing_Type": "TOU",
+    "Month": "January",
+    "Postal_Code": "M5V",
+    "Num_People": 3,
+    "Num_Children": 0,
+    "SqFt": 1200,
+    "Monthly_Income": 0,
+    "Usage_kWh": 980.0,
+    "On_Peak_kWh": 300.0,
+    "Mid_Peak_kWh": 280.0,
+    "Off_Peak_kWh": 400.0,
+    "Delivery_Charge": 0,
+    "Regulatory_Charge": 0,
+    "Rebate_Amount": 0,
+}
+
+
+def _cold_predict():
+    # What predict_bill used to do: parse the .cbm on every call
+    import pandas as pd
+    model = CatBoostRegressor()
+    model.load_model(model_path("tou"))
+    return model.predict(pd.DataFrame([SAMPLE_TOU]))
+
+
+def _time(fn, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def _report(label, samples):
+    samples = sorted(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"{label:<8} mean={statistics.mean(samples):8.3f} ms  "
+          f"p50={statistics.median(samples):8.3f} ms  p99={p99:8.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=100)
+    args = parser.parse_args()
+
+    cold = _time(_cold_predict, args.runs)
+
+    registry.clear()
+    registry.preload()
+    warm = _time(lambda: predict_tou_bill(SAMPLE_TOU), args.runs)
+
+    _report("cold", cold)
+    _report("warm", warm)
+    print(f"speedup  {statistics.mean(cold) / statistics.mean(warm):.1f}x "
+          f"(registry loads: {registry.loads})")
+
+
+if __name__ == "__main__":
+    main()
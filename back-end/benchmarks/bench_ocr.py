@@ -0,0 +1,70 @@
+"""
+Pages/sec for scanned-PDF OCR: the old single-call path (grayscale page,
+one image_to_string per page, sequential) vs ocr_local.ocr_pdf (preprocessed,
+parallel across processes).
+
+Builds a scanned PDF by rasterizing tmp/sample*.pdf, so no fixtures are needed.
+Run from back-end/:
+    python -m benchmarks.bench_ocr --pages 12
+"""
+import argparse
+import glob
+import io
+import os
+import time
+
+import pdfplumber
+import pytesseract
+from PIL import ImageOps
+
+from src.ocr_local import OCR_DPI, ocr_pdf
+
+SAMPLE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "tmp")
+
+
+def scanned_pdf(pages, dpi=OCR_DPI):
+    """Image-only PDF with `pages` pages, cycling through the sample bills."""
+    images = []
+    for path in sorted(glob.glob(os.path.join(SAMPLE_DIR, "sample*.pdf"))):
+        with pdfplumber.open(path) as pdf:
+            images.append(pdf.pages[0].to_image(resolution=dpi).original.convert("RGB"))
+    pages_out = [images[i % len(images)] for i in range(pages)]
+    buf = io.BytesIO()
+    pages_out[0].save(buf, "PDF", resolution=dpi, save_all=True, append_images=pages_out[1:])
+    return buf.getvalue()
+
+
+def single_call_path(pdf_bytes, dpi=OCR_DPI):
+    # Previous behaviour: whole grayscale page into one Tesseract call, page after page
+    texts = []
+    with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+        for page in pdf.pages:
+            img = ImageOps.exif_transpose(page.to_image(resolution=dpi).original).convert("L")
+            texts.append(pytesseract.image_to_string(img, config="--oem 3 --psm 6").strip())
+    return texts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=12)
+    args = parser.parse_args()
+
+    pdf_bytes = scanned_pdf(args.pages)
+
+    start = time.perf_counter()
+    single_call_path(pdf_bytes)
+    single = args.pages / (time.perf_counter() - start)
+
+    ocr_pdf(pdf_bytes)  # warm-up run so worker start-up is not timed
+    start = time.perf_counter()
+    pages = ocr_pdf(pdf_bytes)
+    parallel = args.pages / (time.perf_counter() - start)
+
+    mean_conf = sum(p["confidence"] for p in pages) / len(pages)
+    print(f"single-call  {single:7.2f} pages/sec")
+    print(f"ocr_pdf      {parallel:7.2f} pages/sec  ({parallel / single:.1f}x, "
+          f"mean confidence {mean_conf:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Microbenchmark: the previous multi-regex parse_bill_data vs the compiled
+single-pass extractor, on the tmp/sample*.pdf texts and synthetic statements.
+
+Run from back-end/:
+    python -m benchmarks.bench_parse --pages 20 --runs 200
+"""
+import argparse
+import contextlib
+import glob
+import io
+import os
+import re
+import time
+
+from src.parse import extract_text_from_pdf, parse_bill_data
+
+SAMPLE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "tmp")
+
+FILLER = (
+    "Your electricity is delivered by Example Power Co. Rates are set by the Ontario Energy Board.\n"
+    "Regulatory charges, delivery and HST are itemized on the next page for your reference.\n"
+)
+
+SUMMARIES = {
+    "TOU": (
+        "Plan Type: Time-of-Use (TOU)\n"
+        "Peak ............. 120 kWh @ $0.158/kWh\n"
+        "Mid-Peak ......... 80 kWh @ $0.122/kWh\n"
+        "Off-Peak ......... 260 kWh @ $0.076/kWh\n"
+    ),
+    "Tiered": (
+        "Rate Type: Tiered\n"
+        "Tier 1 (lower rate) ..... 400 kWh @ 9.3¢/kWh\n"
+        "Tier 2 (higher rate) .... 180 kWh @ 11.0¢/kWh\n"
+    ),
+    "Flat/ULO": "Rate Type: Flat/ULO\nTotal Usage ............. 620 kWh\nEnergy 0.12 $/kWh\n",
+}
+
+
+def legacy_parse_bill_data(text):
+    """Verbatim copy of parse_bill_data before the single-pass rewrite (debug print removed)."""
+    bill_data = {} 
+    if "Time-of-Use" in text or "Peak" in text or "Time of use" in text: 
+        bill_data["bill_type"] = "TOU"
+        peak = peak = re.search(r"Peak.*?([\d,.]+)\s?kWh", text)
+        off_peak = re.search(r"Off[- ]Peak.*?([\d,.]+)\s?kWh", text)
+        mid_peak = re.search(r"Mid[- ]Peak.*?([\d,.]+)\s?kWh", text)
+        bill_data["Peak_kWh"] = float(peak.group(1).replace(",", "")) if peak else 0
+        bill_data["OffPeak_kWh"] = float(off_peak.group(1).replace(",", "")) if off_peak else 0
+        bill_data["MidPeak_kWh"] = float(mid_peak.group(1).replace(",", "")) if mid_peak else 0
+        # --- Rate Extraction ---
+        peak_rate = re.search(r"Peak.*?([\d,.]+)\s?(?:\$|¢)?/?kWh", text, re.IGNORECASE)
+        off_rate = re.search(r"Off[- ]Peak.*?([\d,.]+)\s?(?:\$|¢)?/?kWh", text, re.IGNORECASE)
+        mid_rate = re.search(r"Mid[- ]Peak.*?([\d,.]+)\s?(?:\$|¢)?/?kWh", text, re.IGNORECASE)
+
+        bill_data["Peak_Rate"] = peak_rate.group(1) if peak_rate else None
+        bill_data["OffPeak_Rate"] = off_rate.group(1) if off_rate else None
+        bill_data["MidPeak_Rate"] = mid_rate.group(1) if mid_rate else None
+    elif "Tier 1" in text and "Tier 2" in text:
+        bill_data["bill_type"] = "Tiered"
+        tier1 = re.search(r"Tier 1.*?([\d,.]+)\s?kWh", text)
+        tier2 = re.search(r"Tier 2.*?([\d,.]+)\s?kWh", text)
+        bill_data["Tier1_kWh"] = float(tier1.group(1).replace(",", "")) if tier1 else 0
+        bill_data["Tier2_kWh"] = float(tier2.group(1).replace(",", "")) if tier2 else 0
+        # --- Rate Extraction ---
+        tier1_rate = re.search(r"Tier 1.*?([\d,.]+)\s?(?:\$|¢)?/?kWh", text, re.IGNORECASE)
+        tier2_rate = re.search(r"Tier 2.*?([\d,.]+)\s?(?:\$|¢)?/?kWh", text, re.IGNORECASE)
+
+        bill_data["Tier1_Rate"] = tier1_rate.group(1) if tier1_rate else None
+        bill_data["Tier2_Rate"] = tier2_rate.group(1) if tier2_rate else None
+
+    elif "Total Usage" in text:
+        bill_data["bill_type"] = "Flat/ULO"
+        total = re.search(r"Total Usage.*?([\d,.]+)\s?kWh", text)
+        bill_data["Total_kWh"] = float(total.group(1).replace(",", "")) if total else 0
+        # --- Rate Extraction ---
+        flat_rate = re.search(r"([\d,.]+)\s?(?:\$|¢)?/?kWh", text, re.IGNORECASE)
+        bill_data["Rate"] = flat_rate.group(1) if flat_rate else None
+    else: 
+        # if none of the expected keywords are not found, return invalid 
+        return {"error": "Invalid PDF: Could not detect a valid electricity bill."}
+    
+    cost = re.search(r"Total Amount Due[:\s\$]*([\d,.]+)", text)
+    bill_data["Total_Cost"] = float(cost.group(1).replace(",", "")) if cost else None
+
+    # Additional validation: if key usage fields are all zero, treat as invalid
+    usage_values = [v for k, v in bill_data.items() if "_kWh" in k]
+    if all(val == 0 for val in usage_values):
+        return {"error": "Invalid PDF: No electricity usage data found."}
+    
+    return bill_data
+
+
+
+
+def synthetic_statement(bill_type, pages):
+    """Summary block buried after `pages` pages of filler, like a long statement."""
+    body = (FILLER * 30 + "\f") * pages
+    return body + SUMMARIES[bill_type] + "Total Amount Due $118.50\n"
+
+
+def _time(fn, text, runs):
+    start = time.perf_counter()
+    for _ in range(runs):
+        fn(text)
+    return (time.perf_counter() - start) / runs * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    texts = {os.path.basename(p): extract_text_from_pdf(p)
+             for p in sorted(glob.glob(os.path.join(SAMPLE_DIR, "sample*.pdf")))}
+    for bill_type in SUMMARIES:
+        texts[f"synthetic {bill_type} x{args.pages}p"] = synthetic_statement(bill_type, args.pages)
+
+    print(f"{'input':<28}{'chars':>9}{'legacy us':>12}{'single us':>12}{'speedup':>9}")
+    for name, text in texts.items():
+        with contextlib.redirect_stdout(io.StringIO()):  # parse_bill_data debug output
+            legacy = _time(legacy_parse_bill_data, text, args.runs)
+            single = _time(parse_bill_data, text, args.runs)
+        print(f"{name:<28}{len(text):>9}{legacy:>12.1f}{single:>12.1f}{legacy / single:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Accuracy vs latency of the precomputed what-if grids against direct predict_bill.
+
+Build the grids first (python -m src.ML_model.surrogate build), then from back-end/:
+    python -m benchmarks.bench_surrogate --queries 500
+"""
+import argparse
+import random
+import statistics
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.ML_model.callthemodel import cat_features
+from src.ML_model.model import predict_bill
+from src.ML_model.registry import model_path
+from src.ML_model.surrogate import GRID_SPECS, MONTHS, get_surrogate
+
+
+def random_row(name, surrogate, rng):
+    """A random in-grid query: continuous values between grid points."""
+    spec = GRID_SPECS[name]
+    row = {"Billing_Type": spec["billing_type"], "Month": rng.choice(MONTHS),
+           "Postal_Code": rng.choice(list(surrogate.fsa_index))}
+    for axis_name, axis in zip(surrogate.axis_names, surrogate.axes):
+        value = rng.uniform(axis[0], axis[-1])
+        row[axis_name] = round(value) if axis_name in ("Num_People", "SqFt") else value
+    row["Usage_kWh"] = sum(row[a] for a in spec["usage_from"])
+    row.update(spec["fixed"])
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    print(f"{'model':<8}{'MAE $':>8}{'MAPE %':>8}{'max err $':>11}{'grid us':>10}{'model us':>10}")
+    for name in GRID_SPECS:
+        surrogate = get_surrogate(name)
+        if surrogate is None:
+            print(f"{name:<8} no grid (or stale) - run: python -m src.ML_model.surrogate build {name}")
+            continue
+        rows = [random_row(name, surrogate, rng) for _ in range(args.queries)]
+
+        start = time.perf_counter()
+        approx = [surrogate.lookup(r) for r in rows]
+        grid_us = (time.perf_counter() - start) / len(rows) * 1e6
+
+        start = time.perf_counter()
+        exact = [float(predict_bill(model_path(name), pd.DataFrame([r]), cat_features)[0]) for r in rows]
+        model_us = (time.perf_counter() - start) / len(rows) * 1e6
+
+        err = np.abs(np.array(approx) - np.array(exact))
+        mape = statistics.mean(e / abs(x) * 100 for e, x in zip(err, exact) if x)
+        print(f"{name:<8}{err.mean():>8.2f}{mape:>8.2f}{err.max():>11.2f}{grid_us:>10.1f}{model_us:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
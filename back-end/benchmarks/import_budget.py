@@ -0,0 +1,68 @@
+"""
+Startup-time budget: imports the app in a fresh interpreter under
+`python -X importtime` (with PRELOAD_MODELS=0) and exits 1 if the import takes
+longer than the budget or pulls in a library that should only load on demand.
+
+Run from back-end/:
+    python -m benchmarks.import_budget --budget-ms 800
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Must not be imported just to start the app
+DEFERRED = ["sklearn", "pandas", "numpy", "catboost", "pdfplumber", "PIL", "pytesseract",
+            "google.generativeai", "pyarrow"]
+
+LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$")
+
+
+def measure(module):
+    """One cold import -> ({module: cumulative_us}, top-level cumulative us)."""
+    env = dict(os.environ, PRELOAD_MODELS="0", PYTHONDONTWRITEBYTECODE="1")
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=BACKEND_DIR, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    cumulative = {}
+    for line in proc.stderr.splitlines():
+        m = LINE.match(line)
+        if m:
+            cumulative[m.group(4)] = int(m.group(2))
+    return cumulative, cumulative.get(module, 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_BUDGET_MS", "800")))
+    parser.add_argument("--runs", type=int, default=3, help="best of N cold imports")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    runs = [measure(args.module) for _ in range(args.runs)]
+    cumulative, total_us = min(runs, key=lambda r: r[1])
+    total_ms = total_us / 1000
+
+    print(f"import {args.module}: {total_ms:.0f} ms (best of {args.runs}, budget {args.budget_ms:.0f} ms)")
+    print("slowest modules (cumulative):")
+    for name, us in sorted(cumulative.items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    failures = []
+    loaded = [name for name in DEFERRED if name in cumulative]
+    if loaded:
+        failures.append(f"imported at startup but should be lazy: {', '.join(loaded)}")
+    if total_ms > args.budget_ms:
+        failures.append(f"{total_ms:.0f} ms is over the {args.budget_ms:.0f} ms budget")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
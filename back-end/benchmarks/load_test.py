@@ -0,0 +1,131 @@
+"""
+Load test for /analyze and /advice: p50/p90/p99 latency and requests/sec.
+
+With --spawn it starts serve.py itself with a stubbed LLM (LLM_FAKE=1), waits
+for /ready and shuts it down afterwards; otherwise point --url at a running
+server (start it with LLM_FAKE=1 to keep Gemini out of the numbers).
+Run from back-end/:
+    python -m benchmarks.load_test --spawn --requests 400 --concurrency 16
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --unique
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_DIR = os.path.join(BACKEND_DIR, "tmp")
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def spawn_server(port, workers, threads, llm_latency):
+    env = dict(os.environ, PORT=str(port), HOST="127.0.0.1", WEB_WORKERS=str(workers),
+               WEB_THREADS=str(threads), LLM_FAKE="1", LLM_FAKE_LATENCY=str(llm_latency),
+               LOG_LEVEL="warning")
+    proc = subprocess.Popen([sys.executable, "serve.py"], cwd=BACKEND_DIR, env=env)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit("serve.py exited during startup")
+        try:
+            if requests.get(url + "/ready", timeout=1).status_code == 200:
+                return proc, url
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    proc.terminate()
+    raise SystemExit("server did not become ready within 120s")
+
+
+def analyze_request(session, url, pdfs, unique):
+    name, data = random.choice(pdfs)
+    if unique:
+        # Bytes after %%EOF change the hash (cache miss) but not the parsed content
+        data += f"\n% {random.getrandbits(64)}\n".encode()
+    return session.post(url + "/analyze", files={"file": (name, data, "application/pdf")}, timeout=120)
+
+
+def advice_request(session, url, unique):
+    bill = {"bill_type": "TOU", "Peak_kWh": 180, "MidPeak_kWh": 170, "OffPeak_kWh": 500,
+            "Total_Cost": 125.0}
+    if unique:
+        bill.update({k: random.randint(10, 990) for k in ("Peak_kWh", "MidPeak_kWh", "OffPeak_kWh")})
+    return session.post(url + "/advice", json=bill, timeout=120)
+
+
+def run(endpoint, fn, total, concurrency):
+    def one(_):
+        session = requests.Session()
+        start = time.perf_counter()
+        try:
+            ok = fn(session).status_code == 200
+        except requests.RequestException:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(ms for ms, ok in results if ok)
+    return {
+        "endpoint": endpoint,
+        "requests": total,
+        "errors": sum(1 for _, ok in results if not ok),
+        "rps": round(total / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p90_ms": round(percentile(latencies, 90) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "max_ms": round(latencies[-1] * 1000, 1) if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--spawn", action="store_true", help="start serve.py with a stubbed LLM")
+    parser.add_argument("--port", type=int, default=8765, help="port for --spawn")
+    parser.add_argument("--workers", type=int, default=2, help="worker processes for --spawn")
+    parser.add_argument("--threads", type=int, default=8, help="threads per worker for --spawn")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="stub LLM delay (s) for --spawn")
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--unique", action="store_true", help="vary inputs so caches mostly miss")
+    parser.add_argument("--endpoints", default="analyze,advice")
+    args = parser.parse_args()
+
+    pdfs = [(os.path.basename(p), open(p, "rb").read())
+            for p in sorted(glob.glob(os.path.join(SAMPLE_DIR, "sample*.pdf")))]
+    proc, url = spawn_server(args.port, args.workers, args.threads, args.llm_latency) \
+        if args.spawn else (None, args.url.rstrip("/"))
+
+    calls = {
+        "analyze": lambda s: analyze_request(s, url, pdfs, args.unique),
+        "advice": lambda s: advice_request(s, url, args.unique),
+    }
+    try:
+        for endpoint in args.endpoints.split(","):
+            print(json.dumps(run(endpoint, calls[endpoint], args.requests, args.concurrency)))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Prompt token budget for /advice: builds the Gemini request for representative
+payloads (parsed TOU / Tiered / Flat/ULO bills, an /analyze job result with
+the raw bill text, manual and demo form data with a year of bills) and exits 1
+if the system instruction or any user message is over budget, or if a full
+schema answer would not fit under the output cap.
+
+Counts are offline estimates (~4 chars/token); with --api and GEMINI_API_KEY
+set they come from the model's count_tokens instead.
+
+Run from back-end/:
+    python -m benchmarks.prompt_budget --user-budget 200 --system-budget 450
+"""
+import argparse
+import json
+import os
+import sys
+
+os.environ.setdefault("PRELOAD_MODELS", "0")
+
+from src import gemini
+from src.fake_llm import SAMPLE_ADVICE
+from src.local_advice import local_advice
+
+from .synthetic_bills import BILL_TYPES, bill_values
+
+HOME = {"homeSize": "1200", "kindOfHome": "House", "adults": "2", "children": "1",
+        "zipCode": "M5V2T6", "annualIncome": "65000"}
+
+
+def _form_bill(i, bill_type="TOU"):
+    bill = {key: "" for key in gemini.FORM_FIELDS}
+    bill.update(id=str(i), year="2024", month="January", billType=bill_type, zipCode="M5V2T6",
+                homeSize="1200", residents="3")
+    if bill_type == "TOU":
+        bill.update(peakRate="0.20", peakTotal="50", midPeakRate="0.15", midPeakTotal="40",
+                    offPeakRate="0.10", offPeakTotal="30")
+    else:
+        bill.update(tier1Rate="0.12", tier1Total="42", tier2Rate="0.18", tier2Total="60")
+    return bill
+
+
+def payloads():
+    for bill_type in BILL_TYPES:
+        yield f"parsed {bill_type}", bill_values(bill_type)
+    text = "\n".join(f"Jan {d:02d}, 2024   Payment received - thank you   $120.00" for d in range(1, 200))
+    yield "analyze job result", {"bill_data": bill_values("TOU"), "text": text, "ML_total": 0.42}
+    yield "manual, 12 bills", {"type": "manual", "homeInfo": HOME, "bills": [_form_bill(i) for i in range(12)]}
+    yield "demo", {"type": "demo", "data": [_form_bill(1), _form_bill(2, "Tiered")]}
+
+
+def counter(use_api):
+    if not use_api:
+        return gemini.estimate_tokens
+    model = gemini.get_client()
+    return lambda text: model.count_tokens(text).total_tokens
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--user-budget", type=int, default=int(os.getenv("PROMPT_USER_BUDGET", "200")),
+                        help="max tokens per user message")
+    parser.add_argument("--system-budget", type=int, default=int(os.getenv("PROMPT_SYSTEM_BUDGET", "450")),
+                        help="max tokens for the system instruction")
+    parser.add_argument("--api", action="store_true", help="count with the Gemini API instead of estimating")
+    args = parser.parse_args()
+
+    count = counter(args.api)
+    failures = []
+
+    system = count(gemini.SYSTEM_INSTRUCTION)
+    print(f"{'system instruction':24} {system:6d} tokens (budget {args.system_budget})")
+    if system > args.system_budget:
+        failures.append(f"system instruction is {system} tokens, over {args.system_budget}")
+
+    for name, payload in payloads():
+        raw = count(str(payload))  # what the old prompt interpolated
+        user = count(gemini.build_prompt(payload))
+        print(f"{name:24} {user:6d} tokens (raw bill_data {raw})")
+        if user > args.user_budget:
+            failures.append(f"{name}: user message is {user} tokens, over {args.user_budget}")
+
+    answers = [SAMPLE_ADVICE] + [local_advice(bill_values(t)) for t in BILL_TYPES]
+    answer = max(count(json.dumps(a)) for a in answers)
+    print(f"{'largest schema answer':24} {answer:6d} tokens (ANSWER_TOKENS {gemini.ANSWER_TOKENS}, "
+          f"max_output_tokens {gemini.MAX_OUTPUT_TOKENS})")
+    if answer > gemini.ANSWER_TOKENS or gemini.ANSWER_TOKENS > gemini.MAX_OUTPUT_TOKENS:
+        failures.append(f"a {answer}-token answer does not fit ANSWER_TOKENS / GEMINI_MAX_OUTPUT_TOKENS")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,246 @@
+"""
+End-to-end benchmark suite on synthetic bills (see synthetic_bills.py).
+
+Times each stage -- extract (full and early-exit), OCR (scanned PDFs, needs
+Tesseract), parse, predict, advice (stubbed LLM) -- and the /analyze and
+/advice routes through the Flask test client, for every bill type and page
+count. Results are written as JSON; with --baseline the medians are compared
+and the run exits 1 when any case is slower than the baseline by more than
+--threshold (or when a synthetic bill parses to the wrong values).
+
+Run from back-end/:
+    python -m benchmarks.run_suite --save-baseline benchmarks/results/baseline.json
+    python -m benchmarks.run_suite --baseline benchmarks/results/baseline.json
+    python -m benchmarks.run_suite --pages 1 10 --scanned --only ocr analyze
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+# Quiet, in-memory, deterministic app for timing
+os.environ.setdefault("PRELOAD_MODELS", "0")
+os.environ.setdefault("LOG_LEVEL", "ERROR")
+os.environ["ANALYZE_CACHE_DB"] = ""
+
+from app import app
+from src import gemini
+from src.advice_cache import advice_service
+from src.cache import analyze_cache
+from src.fake_llm import FakeGenerativeModel
+from src.local_advice import local_advice
+from src.ocr_local import _tesseract, ocr_pdf_to_text
+from src.parse import extract_bill_data_from_pdf, extract_text_from_pdf, parse_bill_data
+from src.ML_model.callthemodel import ML_total_what_if, predict_batch, predict_tou_bill
+from src.ML_model.registry import registry
+
+from .synthetic_bills import BILL_TYPES, make_bill
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+WHAT_IF = {"month": "January", "zipCode": "M5V", "residents": 3, "homeSize": 1200,
+           "peakTotal": 180, "midPeakTotal": 170, "offPeakTotal": 500}
+TOU_ROW = {"Billing_Type": "TOU", "Month": "January", "Postal_Code": "M5V", "Num_People": 3,
+           "Num_Children": 1, "SqFt": 1200, "Monthly_Income": 0, "Usage_kWh": 850,
+           "On_Peak_kWh": 180, "Mid_Peak_kWh": 170, "Off_Peak_kWh": 500,
+           "Delivery_Charge": 0, "Regulatory_Charge": 0, "Rebate_Amount": 0}
+
+
+def _stats(times):
+    times = sorted(times)
+    return {
+        "n": len(times),
+        "median_ms": round(statistics.median(times) * 1000, 3),
+        "p90_ms": round(times[min(len(times) - 1, int(len(times) * 0.9))] * 1000, 3),
+        "min_ms": round(times[0] * 1000, 3),
+    }
+
+
+def measure(fn, repeat, warmup=1):
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return _stats(times)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def _tesseract_available():
+    try:
+        _tesseract().get_tesseract_version()
+        return True
+    except Exception:
+        return False
+
+
+def build_cases(args):
+    """Yields (name, fn, repeat) plus correctness checks as ("check", name, ok, detail)."""
+    client = app.test_client()
+    for bill_type in BILL_TYPES:
+        slug = bill_type.replace("/", "_").lower()
+        for pages in args.pages:
+            for layout, fields_last in (("first", False), ("last", True)):
+                if layout == "last" and pages == 1:
+                    continue
+                pdf, expected = make_bill(bill_type, pages, fields_last=fields_last)
+                tag = f"{slug}/{pages}p/{layout}"
+
+                text, bill_data, _ = extract_bill_data_from_pdf(io.BytesIO(pdf))
+                got = {k: (bill_data or {}).get(k) for k in expected}
+                yield ("check", f"parse/{tag}", got == expected, None if got == expected else got)
+
+                yield f"extract_full/{tag}", lambda pdf=pdf: extract_text_from_pdf(io.BytesIO(pdf)), args.repeat
+                yield (f"extract_early_exit/{tag}",
+                       lambda pdf=pdf: extract_bill_data_from_pdf(io.BytesIO(pdf)), args.repeat)
+                yield f"parse/{tag}", lambda text=text: parse_bill_data(text), args.repeat * 20
+
+                def analyze(pdf=pdf):
+                    analyze_cache.clear()
+                    resp = client.post("/analyze", data={"file": (io.BytesIO(pdf), "bill.pdf")})
+                    assert resp.status_code == 200, resp.get_data()[:200]
+                yield f"route_analyze/{tag}", analyze, args.repeat
+
+            if args.scanned:
+                scan, expected = make_bill(bill_type, pages, scanned=True)
+                tag = f"{slug}/{pages}p"
+                text = ocr_pdf_to_text(scan, psm=6)
+                got = {k: parse_bill_data(text).get(k) for k in expected}
+                yield ("check", f"ocr_parse/{tag}", got == expected, None if got == expected else got)
+                yield f"ocr/{tag}", lambda scan=scan: ocr_pdf_to_text(scan, psm=6), max(1, args.repeat // 2)
+
+                def analyze_scanned(scan=scan):
+                    analyze_cache.clear()
+                    resp = client.post("/analyze", data={"file": (io.BytesIO(scan), "scan.pdf")})
+                    assert resp.status_code == 200, resp.get_data()[:200]
+                yield f"route_analyze_scanned/{tag}", analyze_scanned, max(1, args.repeat // 2)
+
+    rows = [dict(TOU_ROW, Num_People=1 + i % 6, Usage_kWh=400 + i % 900) for i in range(1000)]
+    yield "predict/single_tou", lambda: predict_tou_bill(TOU_ROW), args.repeat * 20
+    yield "predict/batch_1000", lambda: predict_batch(rows), args.repeat
+    yield "predict/what_if", lambda: ML_total_what_if(WHAT_IF), args.repeat * 20
+
+    bill = {"bill_type": "TOU", "Peak_kWh": 180, "MidPeak_kWh": 170, "OffPeak_kWh": 500, "Total_Cost": 125.0}
+    yield "advice/local", lambda: local_advice(bill), args.repeat * 20
+
+    # The form's <period>Total is kWh, like the parsed *_kWh fields: the same bill
+    # entered by hand must give the same usage (850 kWh) and cost as parsed
+    form = {"billType": "TOU", "peakRate": "0.20", "peakTotal": "180", "midPeakRate": "0.15",
+            "midPeakTotal": "170", "offPeakRate": "0.10", "offPeakTotal": "500"}
+    parsed = {"bill_type": "TOU", "Peak_kWh": 180, "MidPeak_kWh": 170, "OffPeak_kWh": 500,
+              "Peak_Rate": "0.20", "MidPeak_Rate": "0.15", "OffPeak_Rate": "0.10", "Total_Cost": 111.5}
+    got = [{k: local_advice(b)["tips"][k] for k in ("currentUsage", "currentBill")}
+           for b in ({"type": "manual", "bills": [form]}, parsed)]
+    ok = got[0] == got[1] == {"currentUsage": 850, "currentBill": 111.5}
+    yield ("check", "advice/form_units", ok, None if ok else got)
+
+    def service_miss():
+        advice_service.cache.clear()
+        advice_service.get_advice(bill)
+    yield "advice/service_miss", service_miss, args.repeat * 4
+    yield "advice/service_hit", lambda: advice_service.get_advice(bill), args.repeat * 20
+
+    def advice_route():
+        advice_service.cache.clear()
+        resp = client.post("/advice", json=bill)
+        assert resp.status_code == 200 and resp.get_json()["source"] == "llm", resp.get_data()[:200]
+    yield "route_advice/miss", advice_route, args.repeat * 4
+
+
+def compare(results, baseline, threshold, min_delta_ms):
+    """Prints a diff table; returns the names that regressed."""
+    regressions = []
+    print(f"\n{'case':46} {'baseline':>10} {'now':>10} {'change':>8}")
+    for name, now in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:46} {'-':>10} {now['median_ms']:10.3f} {'new':>8}")
+            continue
+        ratio = now["median_ms"] / base["median_ms"] if base["median_ms"] else 1.0
+        flag = ""
+        if ratio > 1 + threshold and now["median_ms"] - base["median_ms"] > min_delta_ms:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:46} {base['median_ms']:10.3f} {now['median_ms']:10.3f} {ratio - 1:+8.0%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 5, 20])
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per case (cheap cases run more)")
+    parser.add_argument("--scanned", action="store_true", help="include OCR cases (needs Tesseract)")
+    parser.add_argument("--only", nargs="+", help="run cases whose name contains any of these")
+    parser.add_argument("--out", default=os.path.join(RESULTS_DIR, "latest.json"))
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--save-baseline", help="also write this run to this path")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown (0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5,
+                        help="ignore slowdowns smaller than this many ms (timer noise)")
+    args = parser.parse_args()
+
+    if args.scanned and not _tesseract_available():
+        print("Tesseract not found: skipping scanned-PDF cases")
+        args.scanned = False
+
+    gemini.set_client(FakeGenerativeModel())
+    registry.preload()
+
+    results, failed_checks = {}, []
+    for case in build_cases(args):
+        if case[0] == "check":
+            _, name, ok, detail = case
+            if not ok:
+                failed_checks.append(name)
+                print(f"CHECK FAILED {name}: {detail}")
+            continue
+        name, fn, repeat = case
+        if args.only and not any(s in name for s in args.only):
+            continue
+        results[name] = measure(fn, repeat)
+        print(f"{name:46} median {results[name]['median_ms']:10.3f} ms  p90 {results[name]['p90_ms']:10.3f} ms")
+
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": {k: v for k, v in vars(args).items() if k not in ("out", "baseline", "save_baseline")},
+        },
+        "results": results,
+        "failed_checks": failed_checks,
+    }
+    for path in filter(None, [args.out, args.save_baseline]):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"wrote {path}")
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+        print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}")
+    return 1 if regressions or failed_checks else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
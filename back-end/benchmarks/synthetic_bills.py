@@ -0,0 +1,189 @@
+"""
+Synthetic utility bills for benchmarks: TOU, Tiered and Flat/ULO statements
+laid out like tmp/sample*.pdf, at any page count, as text PDFs (written
+directly, no PDF library needed) or as scanned-image PDFs (text pages
+rasterized with pdfplumber, plus light noise).
+
+Extra pages are account history and notes. With fields_last=True the usage
+block moves to the final page, which defeats early-exit page reading.
+
+    python -m benchmarks.synthetic_bills --out /tmp/bills --pages 1 5 20 --scanned
+"""
+import argparse
+import io
+import os
+import random
+
+BILL_TYPES = ["TOU", "Tiered", "Flat/ULO"]
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+PAGE_W, PAGE_H = 612, 792
+FONT_SIZE = 11
+LEADING = 15
+LINES_PER_PAGE = 46
+
+
+def bill_values(bill_type, seed=0):
+    """Random but plausible field values; also the expected parse_bill_data output."""
+    rng = random.Random(f"{bill_type}-{seed}")
+    if bill_type == "TOU":
+        fields = {"Peak_kWh": rng.randint(60, 400), "MidPeak_kWh": rng.randint(40, 300),
+                  "OffPeak_kWh": rng.randint(150, 900)}
+    elif bill_type == "Tiered":
+        fields = {"Tier1_kWh": rng.randint(300, 1000), "Tier2_kWh": rng.randint(0, 400)}
+    else:
+        fields = {"Total_kWh": rng.randint(250, 1500)}
+    fields = {k: float(v) for k, v in fields.items()}
+    fields["Total_Cost"] = round(sum(fields.values()) * rng.uniform(0.11, 0.17) + 20, 2)
+    return {"bill_type": bill_type, **fields}
+
+
+def _usage_lines(values):
+    bill_type = values["bill_type"]
+    if bill_type == "TOU":
+        return ["Plan Type: Time-of-Use (TOU)", "Usage Breakdown",
+                f"Peak ............. {values['Peak_kWh']:.0f} kWh",
+                f"Mid-Peak ......... {values['MidPeak_kWh']:.0f} kWh",
+                f"Off-Peak ......... {values['OffPeak_kWh']:.0f} kWh"]
+    if bill_type == "Tiered":
+        return ["Rate Type: Tiered", "Usage Breakdown",
+                f"Tier 1 (lower rate) ..... {values['Tier1_kWh']:.0f} kWh",
+                f"Tier 2 (higher rate) .... {values['Tier2_kWh']:.0f} kWh"]
+    return ["Rate Type: Flat/ULO", f"Total Usage ............. {values['Total_kWh']:.0f} kWh"]
+
+
+def _filler_lines(rng, n):
+    # History rows avoid every parser label (no "Peak", "Tier", "Total", "kWh")
+    lines = ["Account History"]
+    while len(lines) < n:
+        m = rng.choice(MONTHS)
+        lines.append(f"{m} {rng.randint(1, 28):02d}, 2024   Payment received - thank you   ${rng.uniform(40, 250):.2f}")
+    return lines[:n]
+
+
+def bill_pages(values, pages=1, fields_last=False, seed=0):
+    """Lines of text per page for one statement."""
+    rng = random.Random(seed)
+    month = rng.choice(MONTHS)
+    header = ["Utility: Example Power Co.", f"Account: {rng.randint(1000000, 9999999)}",
+              f"Billing Period: {month} 01, 2025 - {month} 28, 2025"]
+    usage = _usage_lines(values) + ["Other Charges", "Delivery, Taxes, etc.",
+                                    f"Total Amount Due ${values['Total_Cost']:.2f}",
+                                    f"Due Date: {month} 28, 2025"]
+    out = [[f"Page {i + 1} of {pages}"] for i in range(pages)]
+    out[0] += header
+    target = out[-1] if fields_last else out[0]
+    target += usage
+    for page in out:
+        page += _filler_lines(rng, LINES_PER_PAGE - len(page))
+    return out
+
+
+def _pdf_escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def text_pdf(pages_lines):
+    """Minimal PDF 1.4 with a Helvetica text layer, one page per list of lines."""
+    objects = []  # bodies, object number = index + 1
+
+    def add(body):
+        objects.append(body)
+        return len(objects)
+
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    pages_obj = add(b"")  # filled in below
+    kids = []
+    for lines in pages_lines:
+        ops = [f"BT /F1 {FONT_SIZE} Tf {LEADING} TL 56 {PAGE_H - 60} Td"]
+        for line in lines:
+            ops.append(f"({_pdf_escape(line)}) Tj T*")
+        ops.append("ET")
+        stream = "\n".join(ops).encode("cp1252", "replace")
+        content = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        kids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] /Resources << /Font << /F1 %d 0 R >> >> "
+            b"/Contents %d 0 R >>" % (pages_obj, PAGE_W, PAGE_H, font, content)
+        ))
+    objects[pages_obj - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % k for k in kids), len(kids))
+    catalog = add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_obj)
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, catalog, xref))
+    return out.getvalue()
+
+
+def scanned_pdf(pdf_bytes, dpi=200, noise=0.02, seed=0):
+    """Rasterizes a text PDF into an image-only PDF, sprinkling salt-and-pepper noise."""
+    import pdfplumber
+    from PIL import Image
+
+    rng = random.Random(seed)
+    images = []
+    with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+        for page in pdf.pages:
+            img = page.to_image(resolution=dpi).original.convert("L")
+            if noise:
+                px = img.load()
+                for _ in range(int(img.width * img.height * noise / 100)):
+                    px[rng.randrange(img.width), rng.randrange(img.height)] = rng.choice((0, 255))
+            images.append(img.convert("RGB"))
+    buf = io.BytesIO()
+    images[0].save(buf, "PDF", resolution=dpi, save_all=True, append_images=images[1:])
+    for img in images:
+        img.close()
+    return buf.getvalue()
+
+
+def bill_period(seed=0):
+    """Expected Billing_Period of the statement bill_pages(..., seed) prints."""
+    month = MONTHS.index(random.Random(seed).choice(MONTHS)) + 1
+    return {"start": f"2025-{month:02d}-01", "end": f"2025-{month:02d}-28"}
+
+
+def make_bill(bill_type, pages=1, scanned=False, fields_last=False, seed=0, dpi=200):
+    """Returns (pdf_bytes, expected bill_data)."""
+    values = bill_values(bill_type, seed)
+    pdf = text_pdf(bill_pages(values, pages, fields_last, seed))
+    if scanned:
+        pdf = scanned_pdf(pdf, dpi=dpi, seed=seed)
+    return pdf, {**values, "Billing_Period": bill_period(seed)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write synthetic bill PDFs.")
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1])
+    parser.add_argument("--count", type=int, default=1, help="statements per type and page count")
+    parser.add_argument("--scanned", action="store_true", help="also write scanned-image versions")
+    parser.add_argument("--fields-last", action="store_true", help="put the usage block on the last page")
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    written = 0
+    for bill_type in BILL_TYPES:
+        slug = bill_type.replace("/", "_").lower()
+        for pages in args.pages:
+            for i in range(args.count):
+                for scanned in ([False, True] if args.scanned else [False]):
+                    pdf, _ = make_bill(bill_type, pages, scanned, args.fields_last, seed=i)
+                    name = f"{slug}_{pages}p_{i:03d}{'_scan' if scanned else ''}.pdf"
+                    with open(os.path.join(args.out, name), "wb") as f:
+                        f.write(pdf)
+                    written += 1
+    print(f"wrote {written} PDFs to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Production entry point: gunicorn with the app preloaded in the master.
+
+The app (models, what-if grids, OCR/LLM clients) is imported and warmed once,
+then the heap is frozen and workers are forked, so every worker shares the
+model memory copy-on-write instead of loading its own copy.
+
+    python serve.py
+
+Env: PORT (8000), HOST (0.0.0.0), WEB_WORKERS (CPU count), WEB_THREADS (4),
+WEB_TIMEOUT (120 s, covers OCR + LLM), LOG_LEVEL. LLM_FAKE=1 stubs the LLM.
+OCR_PROCESSES defaults to the CPUs divided by WEB_WORKERS (per-worker OCR pool).
+With more than one worker, background job state goes to JOB_STORE_DB (default
+instance/jobs.sqlite3) so /jobs/<id> answers from whichever worker gets the poll.
+"""
+import gc
+import os
+
+from gunicorn.app.base import BaseApplication
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class StandaloneApplication(BaseApplication):
+    def __init__(self, options=None):
+        self.options = options or {}
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            if key in self.cfg.settings and value is not None:
+                self.cfg.set(key.lower(), value)
+
+    def load(self):
+        os.environ.setdefault("PRELOAD_MODELS", "1")
+        # Every worker gets its own OCR pool: share the CPUs instead of each taking all of them
+        workers = self.options.get("workers") or 1
+        os.environ.setdefault("OCR_PROCESSES", str(max(1, (os.cpu_count() or 2) // workers)))
+        if workers > 1:
+            # /analyze?mode=job runs in the worker that took the upload, but its
+            # /jobs/<id> polls can land on any worker: share job state on disk
+            os.environ.setdefault("JOB_STORE_DB", os.path.join(BACKEND_DIR, "instance", "jobs.sqlite3"))
+        from app import app
+        from src import warmup
+        if os.environ["PRELOAD_MODELS"] == "1":
+            warmup.warm_up()
+
+        # Move everything loaded so far out of the GC's reach: collections in the
+        # workers would otherwise touch (and un-share) every preloaded object
+        gc.collect()
+        gc.freeze()
+        return app
+
+
+def options_from_env():
+    return {
+        "bind": f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '8000')}",
+        "workers": int(os.getenv("WEB_WORKERS", str(os.cpu_count() or 2))),
+        "threads": int(os.getenv("WEB_THREADS", "4")),
+        "worker_class": "gthread",
+        "timeout": int(os.getenv("WEB_TIMEOUT", "120")),
+        "preload_app": True,
+        "loglevel": os.getenv("LOG_LEVEL", "info").lower(),
+        "accesslog": os.getenv("WEB_ACCESS_LOG"),
+    }
+
+
+if __name__ == "__main__":
+    StandaloneApplication(options_from_env()).run()
@@ -1,58 +1,149 @@
 import os
-import pandas as pd
-from model import predict_bill
+import math
+from .model import compact_predictor, predict_bill
+from .registry import model_path, registry
+from ..metrics import stage_timer
 
 # Define categorical features (must match training)
 cat_features = ["Month", "Postal_Code", "Billing_Type"]
 
+# Billing_Type value -> registry model name
+BILLING_TYPE_MODELS = {"TOU": "tou", "Tiered": "tiered", "ULO": "ulo"}
+
+# pandas/numpy/catboost are imported inside the functions that need them so
+# importing this module (and the Flask routes) stays cheap
+
+# Single-row predictions skip pandas (see model.CompactPredictor); 0 = DataFrame path
+COMPACT_INFERENCE = os.getenv("COMPACT_INFERENCE", "1") == "1"
+
 # Correct base directory — no double ML_model
 base_dir = os.path.dirname(__file__)
 
 def predict_tiered_bill(input_dict):
+    if COMPACT_INFERENCE:
+        return compact_predictor(model_path("tiered")).predict([input_dict])
+    import pandas as pd
     input_df = pd.DataFrame([input_dict])
-    model_path = os.path.join(base_dir, "tiered_model.cbm")
-    return predict_bill(model_path, input_df, cat_features)
+    return predict_bill(model_path("tiered"), input_df, cat_features)
 
 def predict_tou_bill(input_dict):
+    if COMPACT_INFERENCE:
+        return compact_predictor(model_path("tou")).predict([input_dict])
+    import pandas as pd
     input_df = pd.DataFrame([input_dict])
-    model_path = os.path.join(base_dir, "tou_model.cbm")
-    return predict_bill(model_path, input_df, cat_features)
+    return predict_bill(model_path("tou"), input_df, cat_features)
 
 def predict_ulo_bill(input_dict):
+    if COMPACT_INFERENCE:
+        return compact_predictor(model_path("ulo")).predict([input_dict])
+    import pandas as pd
     input_df = pd.DataFrame([input_dict])
-    model_path = os.path.join(base_dir, "ulo_model.cbm")
-    return predict_bill(model_path, input_df, cat_features)
+    return predict_bill(model_path("ulo"), input_df, cat_features)
 
-def ML_total(frontend_input):
-    """
-    Parent function to process frontend input and return TOU bill prediction score.
-    Score = peakTotal / predicted_bill
-    """
-    peak_total = float(frontend_input.get("peakTotal", 0))
+def _number(value):
+    """Form values arrive as strings ("300", "1,200", ""); anything unparsable counts as 0."""
+    try:
+        number = float(str(value or 0).replace(",", "").strip() or 0)
+    except ValueError:
+        return 0.0
+    return number if math.isfinite(number) else 0.0
 
-    tou_input = {
+def _tou_features(frontend_input):
+    peak_total = _number(frontend_input.get("peakTotal"))
+    mid_peak_total = _number(frontend_input.get("midPeakTotal"))
+    off_peak_total = _number(frontend_input.get("offPeakTotal"))
+    return {
         "Billing_Type": "TOU",
         "Month": frontend_input.get("month", ""),
         "Postal_Code": frontend_input.get("zipCode", ""),
-        "Num_People": int(frontend_input.get("residents", 0)),
+        "Num_People": max(0, int(_number(frontend_input.get("residents")))),
         "Num_Children": 0,
-        "SqFt": int(frontend_input.get("homeSize", 0)),
+        "SqFt": max(0, int(_number(frontend_input.get("homeSize")))),
         "Monthly_Income": 0,
-        "Usage_kWh": peak_total +
-                     float(frontend_input.get("midPeakTotal", 0)) +
-                     float(frontend_input.get("offPeakTotal", 0)),
+        "Usage_kWh": peak_total + mid_peak_total + off_peak_total,
         "On_Peak_kWh": peak_total,
-        "Mid_Peak_kWh": float(frontend_input.get("midPeakTotal", 0)),
-        "Off_Peak_kWh": float(frontend_input.get("offPeakTotal", 0)),
+        "Mid_Peak_kWh": mid_peak_total,
+        "Off_Peak_kWh": off_peak_total,
         "Delivery_Charge": 0,
         "Regulatory_Charge": 0,
         "Rebate_Amount": 0
     }
 
+def _score(prediction, peak_total):
+    score = (prediction / peak_total)*100 if prediction != 0 else 0
+    return score if math.isfinite(score) else None
+
+def ML_total(frontend_input):
+    """
+    Parent function to process frontend input and return TOU bill prediction score.
+    Score = peakTotal / predicted_bill
+    None when there is no peak usage to score against (the ratio would be inf).
+    """
+    peak_total = _number(frontend_input.get("peakTotal"))
+    if not peak_total:
+        return None
+    tou_input = _tou_features(frontend_input)
+
     prediction = predict_tou_bill(tou_input)
-    score = (prediction[0] / peak_total)*100 if prediction[0] != 0 else 0
-    return score
-    
+    return _score(float(prediction[0]), peak_total)
+
+def ML_total_what_if(frontend_input):
+    """
+    Same score as ML_total, answered from the precomputed grid when the inputs
+    fall inside it (see surrogate.py). Returns (score, "grid" | "model"), or
+    (None, None) without peak usage, like ML_total.
+    """
+    from .surrogate import predict_what_if
+    peak_total = _number(frontend_input.get("peakTotal"))
+    if not peak_total:
+        return None, None
+    prediction, source = predict_what_if(_tou_features(frontend_input))
+    return _score(float(prediction), peak_total), source
+
+def predict_row(row):
+    """One training-schema row -> predicted Total_Bill (NaN for an unknown Billing_Type)."""
+    name = BILLING_TYPE_MODELS.get(row.get("Billing_Type"))
+    if name is None:
+        return float("nan")
+    if COMPACT_INFERENCE:
+        return float(compact_predictor(model_path(name)).predict([row])[0])
+    return float(predict_batch([row])[0])
+
+def predict_batch(rows):
+    """
+    Predicts Total_Bill for many rows at once (list of dicts or DataFrame in the
+    training-data schema, each with a Billing_Type of TOU, Tiered or ULO).
+    Rows are grouped by Billing_Type so each model runs one columnar predict.
+    Returns a float array in input order; NaN for unknown billing types.
+    """
+    import numpy as np
+    import pandas as pd
+    from catboost import Pool
+
+    df = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(list(rows))
+    df = df.reset_index(drop=True)
+    out = np.full(len(df), np.nan)
+    if df.empty or "Billing_Type" not in df.columns:
+        return out
+
+    for billing_type, idx in df.groupby("Billing_Type", sort=False).indices.items():
+        name = BILLING_TYPE_MODELS.get(billing_type)
+        if name is None:
+            continue
+        model = registry.get_named(name)
+        features = model.feature_names_
+        group = df.iloc[idx].reindex(columns=features)
+        group_cats = [c for c in cat_features if c in features]
+        for c in features:
+            if c in group_cats:
+                group[c] = group[c].fillna("").astype(str)
+            else:
+                group[c] = pd.to_numeric(group[c], errors="coerce").fillna(0)
+        with stage_timer("predict"):
+            pool = Pool(group, cat_features=group_cats)
+            out[idx] = model.predict(pool)
+    return out
+
 """
 # Optional test block
 if __name__ == "__main__":
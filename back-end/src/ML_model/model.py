@@ -1,67 +1,68 @@
-import os
-import pandas as pd
-from catboost import CatBoostRegressor
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_squared_error
-import numpy as np
+from .registry import registry
+from ..metrics import stage_timer
 
-def train_and_evaluate(file_path, model_name, cat_features):
+def predict_bill(model_path, input_df, cat_features):
     """
-    Trains a CatBoost model with train-test split and evaluates RMSE.
-    Use only when you manually want to retrain models.
+    Predicts total bill for new input data with a trained CatBoost model.
+    The model is parsed once and served from the shared registry afterwards.
     """
-    base_dir = os.path.dirname(__file__)
-    full_path = os.path.join(base_dir, file_path)
+    import pandas as pd
 
-    # Load dataset
-    df = pd.read_csv(full_path)
-    print(f"📄 {file_path} — original rows: {len(df)}")
+    model = registry.get(model_path)
 
-    if "Total_Bill" not in df.columns:
-        raise ValueError(f"❌ Column 'Total_Bill' not found in {file_path}")
+    # Ensure input is a DataFrame
+    if not isinstance(input_df, pd.DataFrame):
+        input_df = pd.DataFrame([input_df])
 
-    df = df[df["Total_Bill"].notnull()]
-    print(f"✅ {file_path} — retained rows: {len(df)}")
+    with stage_timer("predict"):
+        prediction = model.predict(input_df)
+    return prediction
 
-    # Separate features and target
-    X = df.drop(columns=["Total_Bill"])
-    y = df["Total_Bill"]
+class CompactPredictor:
+    """
+    Pandas-free inference for one loaded model. Rows are laid out in the
+    model's own feature order, categoricals as str and numerics as float,
+    and scored from a Pool built from plain lists (same values as the
+    DataFrame path, without the per-call frame construction).
+    """
 
-    # Train-test split
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    def __init__(self, model):
+        self.model = model
+        self.features = list(model.feature_names_)
+        self.cat_idx = list(model.get_cat_feature_indices())
+        cats = set(self.cat_idx)
+        self._is_cat = [i in cats for i in range(len(self.features))]
 
-    # Train CatBoost model
-    model = CatBoostRegressor(iterations=500, learning_rate=0.05, depth=6, verbose=100)
-    model.fit(X_train, y_train, cat_features=cat_features)
+    def encode(self, row):
+        """dict -> feature list; missing categoricals become "", missing numerics 0."""
+        out = []
+        for name, is_cat in zip(self.features, self._is_cat):
+            value = row.get(name)
+            if is_cat:
+                out.append("" if value is None else str(value))
+            else:
+                out.append(0.0 if value is None or value == "" else float(value))
+        return out
 
-    # Evaluate model
-    y_pred = model.predict(X_test)
-    rmse = np.sqrt(mean_squared_error(y_test, y_pred))
-    mean_actual = np.mean(y_test)
-    rmse_percent = (rmse / mean_actual) * 100
-    print(f"📊 {model_name} RMSE: {rmse_percent:.2f}% of mean actual")
+    def predict(self, rows):
+        from catboost import Pool
 
-    # Save trained model
-    model_path = os.path.join(base_dir, model_name)
-    model.save_model(model_path)
-    print(f"💾 Saved model: {model_name}")
+        pool = Pool([self.encode(r) for r in rows], cat_features=self.cat_idx,
+                    feature_names=self.features)
+        # One row is too small to win anything from CatBoost's thread pool
+        with stage_timer("predict"):
+            return self.model.predict(pool, thread_count=1)
 
-def predict_bill(model_path, input_df, cat_features):
-    """
-    Loads a trained CatBoost model and predicts total bill for new input data.
-    """
-    model = CatBoostRegressor()
-    model.load_model(model_path)
 
-    # Ensure input is a DataFrame
-    if not isinstance(input_df, pd.DataFrame):
-        input_df = pd.DataFrame([input_df])
+_compact = {}  # model path -> CompactPredictor, rebuilt when the registry swaps the model
 
-    prediction = model.predict(input_df)
-    return prediction
+def compact_predictor(model_path):
+    model = registry.get(model_path)
+    predictor = _compact.get(model_path)
+    if predictor is None or predictor.model is not model:
+        predictor = _compact[model_path] = CompactPredictor(model)
+    return predictor
 
 # 🔒 Safe import — no training unless run directly
 if __name__ == "__main__":
     print("✅ model.py loaded successfully — no training performed.")
-
-    
\ No newline at end of file
@@ -0,0 +1,91 @@
+import os
+import hashlib
+import threading
+
+from ..metrics import stage_timer
+
+# Models shipped next to this file, keyed by the name used across the app
+base_dir = os.path.dirname(__file__)
+MODEL_FILES = {
+    "tiered": "tiered_model.cbm",
+    "tou": "tou_model.cbm",
+    "ulo": "ulo_model.cbm",
+}
+
+
+def _file_sha256(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of loaded CatBoost models.
+    A model is parsed from disk once and reused; it is only reloaded when the
+    file's mtime changes AND its content hash differs from the loaded copy.
+    """
+
+    def __init__(self):
+        self._models = {}  # abs path -> {"mtime", "sha256", "model"}
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def get(self, model_path):
+        path = os.path.abspath(model_path)
+        mtime = os.stat(path).st_mtime_ns
+
+        entry = self._models.get(path)
+        if entry is not None and entry["mtime"] == mtime:
+            return entry["model"]
+
+        with self._lock:
+            # Another thread may have reloaded while we waited for the lock
+            entry = self._models.get(path)
+            if entry is not None and entry["mtime"] == mtime:
+                return entry["model"]
+
+            sha = _file_sha256(path)
+            if entry is not None and entry["sha256"] == sha:
+                # Touched but unchanged: keep the parsed model
+                entry["mtime"] = mtime
+                return entry["model"]
+
+            from catboost import CatBoostRegressor
+
+            with stage_timer("model_load"):
+                model = CatBoostRegressor()
+                model.load_model(path)
+            self._models[path] = {"mtime": mtime, "sha256": sha, "model": model}
+            self.loads += 1
+            return model
+
+    def get_named(self, name):
+        return self.get(model_path(name))
+
+    def preload(self, names=None):
+        """Load every known model (or just `names`) so the first request is warm."""
+        for name in names or MODEL_FILES:
+            self.get_named(name)
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+
+    def loaded(self):
+        return {path: entry["sha256"] for path, entry in self._models.items()}
+
+
+def model_path(name):
+    return os.path.join(base_dir, MODEL_FILES[name])
+
+
+# Shared instance used by predict_bill and the Flask app
+registry = ModelRegistry()
+
+
+def preload_models(names=None):
+    registry.preload(names)
+    return registry
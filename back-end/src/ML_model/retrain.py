@@ -0,0 +1,413 @@
+"""
+Incremental retraining for the bill models.
+
+Labeled rows live in a columnar store (one directory of Parquet part files per
+model, plus a holdout/ subdirectory). The first run seeds each store from the
+shipped *_HTV.txt file, holding out the same 20% test split train.py used for
+the shipped .cbm, and registers that model as version v0000. Appended rows
+send every 5th row (by content hash) to the holdout. No version ever trains on
+the holdout, so all of them are compared on it fairly. After that, `train`:
+
+  * warm-starts from the current version (CatBoost init_model) on the parts it
+    has not seen yet plus a replay sample of older rows; `--full` retrains,
+  * trains the models in parallel, splitting a thread budget between them,
+  * writes each new version to versions/<name>/<name>-vNNNN.cbm atomically,
+    records it in versions/manifest.json and, unless --no-promote, swaps it into
+    the served <name>_model.cbm path. ModelRegistry sees the new mtime/hash and
+    reloads on the next request; surrogate grids for the old model stop being used.
+  * reports rows, training time and holdout RMSE (new vs previous version);
+    `report --evaluate` re-scores every stored version on the current holdout.
+
+    python -m src.ML_model.retrain append tou new_tou_rows.csv
+    python -m src.ML_model.retrain train [tou tiered ulo] [--full] [--threads 8] [--no-promote]
+    python -m src.ML_model.retrain promote tou v0002
+    python -m src.ML_model.retrain report [--evaluate]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import threading
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from catboost import CatBoostRegressor, Pool
+
+from .registry import MODEL_FILES, base_dir, model_path, _file_sha256
+
+STORE_DIR = os.getenv("MODEL_STORE_DIR", base_dir)
+DATASET_DIR = os.path.join(STORE_DIR, "dataset")
+VERSIONS_DIR = os.path.join(STORE_DIR, "versions")
+MANIFEST_PATH = os.path.join(VERSIONS_DIR, "manifest.json")
+
+TRAINING_FILES = {"tou": "TOU_HTV.txt", "tiered": "Tiered_HTV.txt", "ulo": "ULO_HTV.txt"}
+CAT_FEATURES = ["Month", "Postal_Code", "Billing_Type"]
+TARGET = "Total_Bill"
+
+# Same settings as train.train_and_evaluate for full fits; warm starts add fewer trees
+FULL_PARAMS = {"iterations": 500, "learning_rate": 0.05, "depth": 6}
+WARM_ITERATIONS = int(os.getenv("RETRAIN_WARM_ITERATIONS", "150"))
+# Share of already-seen training rows mixed into a warm start so old data is not forgotten
+REPLAY_FRACTION = float(os.getenv("RETRAIN_REPLAY_FRACTION", "0.3"))
+# Every 5th appended row (by content hash) joins the holdout, so it is stable across versions
+HOLDOUT_MOD = 5
+# train.py's split for the shipped models; reproduced so v0000 is never scored on its own training rows
+SEED_TEST_SIZE = 0.2
+SEED_RANDOM_STATE = 42
+
+_manifest_lock = threading.Lock()
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def _atomic_write_json(path, data):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _atomic_copy(src, dst):
+    tmp = f"{dst}.tmp"
+    shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+
+
+def load_manifest():
+    if not os.path.exists(MANIFEST_PATH):
+        return {"models": {}}
+    with open(MANIFEST_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest):
+    os.makedirs(VERSIONS_DIR, exist_ok=True)
+    with _manifest_lock:
+        _atomic_write_json(MANIFEST_PATH, manifest)
+
+
+# ---------- dataset store ----------
+
+def dataset_path(name, holdout=False):
+    return os.path.join(DATASET_DIR, name, "holdout") if holdout else os.path.join(DATASET_DIR, name)
+
+
+def list_parts(name, holdout=False):
+    path = dataset_path(name, holdout)
+    if not os.path.isdir(path):
+        return []
+    return sorted(p for p in os.listdir(path) if p.endswith(".parquet"))
+
+
+def _write_part(path, part, df):
+    os.makedirs(path, exist_ok=True)
+    tmp = os.path.join(path, part + ".tmp")
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, os.path.join(path, part))
+
+
+def schema_columns(name):
+    """Training columns for `name`, taken from its shipped training file."""
+    return list(pd.read_csv(os.path.join(base_dir, TRAINING_FILES[name]), nrows=0).columns)
+
+
+def _holdout_mask(df):
+    return pd.util.hash_pandas_object(df.drop(columns=[TARGET]), index=False).to_numpy() % HOLDOUT_MOD == 0
+
+
+def _split_seed(df):
+    """(train, test) exactly as train.train_and_evaluate split the shipped training file."""
+    from sklearn.model_selection import train_test_split
+    return train_test_split(df, test_size=SEED_TEST_SIZE, random_state=SEED_RANDOM_STATE)
+
+
+def append_rows(name, rows, split=None):
+    """
+    Adds labeled rows (DataFrame, list of dicts or a .csv/.parquet path) to the
+    store as a new part file, and their holdout share (`split(df)` -> (train,
+    test); default: every HOLDOUT_MOD-th row by hash) as the same part under
+    holdout/. Returns the part name, or None if nothing was added.
+    """
+    if isinstance(rows, str):
+        rows = pd.read_parquet(rows) if rows.endswith(".parquet") else pd.read_csv(rows)
+    df = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(list(rows))
+
+    columns = schema_columns(name)
+    missing = [c for c in columns if c not in df.columns]
+    if missing:
+        raise ValueError(f"{name}: rows are missing columns {missing}")
+    df = df[columns]
+    df = df[df[TARGET].notnull()]
+    if df.empty:
+        return None
+
+    if split is None:
+        is_test = _holdout_mask(df)
+        train, test = df[~is_test], df[is_test]
+    else:
+        train, test = split(df)
+    part = f"part-{len(list_parts(name)):05d}-{datetime.now(timezone.utc):%Y%m%dT%H%M%S}.parquet"
+    # Holdout first: a crash in between must not leave its rows in the training parts
+    _write_part(dataset_path(name, holdout=True), part, test)
+    _write_part(dataset_path(name), part, train)
+    return part
+
+
+def load_dataset(name, parts=None, holdout=False):
+    parts = list_parts(name, holdout) if parts is None else parts
+    if not parts:
+        return pd.DataFrame(columns=schema_columns(name))
+    frames = [pd.read_parquet(os.path.join(dataset_path(name, holdout), p)) for p in parts]
+    return pd.concat(frames, ignore_index=True)
+
+
+def _migrate_holdout(name):
+    """
+    Stores written before the holdout existed kept every row in the training
+    parts. Moves the held-out rows out: train.py's split for the seed part,
+    the hash rule for appended parts.
+    """
+    parts = list_parts(name)
+    if not parts or list_parts(name, holdout=True):
+        return
+    for i, part in enumerate(parts):
+        path = os.path.join(dataset_path(name), part)
+        df = pd.read_parquet(path)
+        if i == 0:
+            train, test = _split_seed(df)
+        else:
+            is_test = _holdout_mask(df)
+            train, test = df[~is_test], df[is_test]
+        _write_part(dataset_path(name, holdout=True), part, test)
+        _write_part(dataset_path(name), part, train)
+
+
+def bootstrap(name, manifest):
+    """Seeds the store from the shipped CSV and registers the shipped model as v0000."""
+    if not list_parts(name):
+        append_rows(name, os.path.join(base_dir, TRAINING_FILES[name]), split=_split_seed)
+    _migrate_holdout(name)
+    if name in manifest["models"]:
+        return
+    os.makedirs(os.path.join(VERSIONS_DIR, name), exist_ok=True)
+    artifact = os.path.join(VERSIONS_DIR, name, f"{name}-v0000.cbm")
+    _atomic_copy(model_path(name), artifact)
+    manifest["models"][name] = {
+        "current": "v0000",
+        "versions": [{
+            "version": "v0000", "file": os.path.relpath(artifact, VERSIONS_DIR),
+            "sha256": _file_sha256(artifact), "created_at": _now(), "mode": "shipped",
+            "parts": list_parts(name)[:1],
+        }],
+    }
+
+
+# ---------- training ----------
+
+def _pool(df):
+    X = df.drop(columns=[TARGET])
+    return Pool(X, df[TARGET], cat_features=[c for c in CAT_FEATURES if c in X.columns])
+
+
+def _rmse(model, test):
+    if test.empty:
+        return None, None
+    pred = model.predict(_pool(test))
+    rmse = float(np.sqrt(np.mean((test[TARGET].to_numpy() - pred) ** 2)))
+    return round(rmse, 4), round(rmse / float(test[TARGET].mean()) * 100, 2)
+
+
+def _current(entry):
+    return next(v for v in entry["versions"] if v["version"] == entry["current"])
+
+
+def train_model(name, entry, full=False, threads=1, seed=42):
+    """
+    Trains one new version of `name` into versions/<name>/ (not yet promoted).
+    Returns the version record, or None when there is no new data.
+    """
+    previous = _current(entry)
+    parts = list_parts(name)
+    seen = set(previous.get("parts", []))
+    new_parts = [p for p in parts if p not in seen]
+    if not new_parts and not full:
+        return None
+
+    df = load_dataset(name, parts)
+    sizes = [len(pd.read_parquet(os.path.join(dataset_path(name), p), columns=[TARGET])) for p in parts]
+    is_new = np.repeat([p in new_parts for p in parts], sizes)
+    test = load_dataset(name, holdout=True)
+
+    prev_model = CatBoostRegressor()
+    prev_model.load_model(os.path.join(VERSIONS_DIR, previous["file"]))
+
+    start = time.perf_counter()
+    if full:
+        train = df
+        model = CatBoostRegressor(**FULL_PARAMS, thread_count=threads, random_seed=seed,
+                                  verbose=False, allow_writing_files=False)
+        model.fit(_pool(train))
+        mode, iterations = "full", FULL_PARAMS["iterations"]
+    else:
+        new_rows = df[is_new]
+        old_rows = df[~is_new]
+        replay = old_rows.sample(frac=REPLAY_FRACTION, random_state=seed) if len(old_rows) else old_rows
+        train = pd.concat([new_rows, replay], ignore_index=True)
+        model = CatBoostRegressor(iterations=WARM_ITERATIONS, learning_rate=FULL_PARAMS["learning_rate"],
+                                  depth=FULL_PARAMS["depth"], thread_count=threads,
+                                  random_seed=seed, verbose=False, allow_writing_files=False)
+        # Continue boosting from the previous trees instead of starting over
+        model.fit(_pool(train), init_model=prev_model)
+        mode, iterations = "warm", WARM_ITERATIONS
+    train_seconds = time.perf_counter() - start
+
+    number = max(int(v["version"][1:]) for v in entry["versions"]) + 1
+    version = f"v{number:04d}"
+    artifact = os.path.join(VERSIONS_DIR, name, f"{name}-{version}.cbm")
+    tmp = artifact + ".tmp"
+    model.save_model(tmp)
+    os.replace(tmp, artifact)
+
+    rmse, rmse_percent = _rmse(model, test)
+    prev_rmse, prev_rmse_percent = _rmse(prev_model, test)
+    return {
+        "version": version, "file": os.path.relpath(artifact, VERSIONS_DIR),
+        "sha256": _file_sha256(artifact), "created_at": _now(), "mode": mode,
+        "init_from": None if full else previous["version"], "parts": parts,
+        "rows_train": int(len(train)), "rows_new": int(is_new.sum()),
+        "rows_test": int(len(test)), "iterations": iterations, "threads": threads,
+        "train_seconds": round(train_seconds, 2), "rmse": rmse, "rmse_percent": rmse_percent,
+        "previous_rmse": prev_rmse, "previous_rmse_percent": prev_rmse_percent,
+    }
+
+
+def promote(name, version, manifest=None):
+    """Atomically swaps a stored version into the served model path."""
+    manifest = manifest or load_manifest()
+    entry = manifest["models"][name]
+    record = next((v for v in entry["versions"] if v["version"] == version), None)
+    if record is None:
+        raise ValueError(f"{name}: unknown version {version}")
+    _atomic_copy(os.path.join(VERSIONS_DIR, record["file"]), model_path(name))
+    entry["current"] = version
+    entry["promoted_at"] = _now()
+    save_manifest(manifest)
+
+
+def retrain(names=None, full=False, threads=None, promote_new=True):
+    """Trains `names` (default: all) in parallel; returns {name: version record or None}."""
+    names = list(names or MODEL_FILES)
+    threads = threads or os.cpu_count() or 1
+    per_model = max(1, threads // len(names))
+
+    manifest = load_manifest()
+    for name in names:
+        bootstrap(name, manifest)
+    save_manifest(manifest)
+
+    with ThreadPoolExecutor(len(names)) as pool:  # CatBoost releases the GIL while fitting
+        futures = {name: pool.submit(train_model, name, manifest["models"][name], full, per_model)
+                   for name in names}
+        results = {name: f.result() for name, f in futures.items()}
+
+    for name, record in results.items():
+        if record is not None:
+            manifest["models"][name]["versions"].append(record)
+            if not promote_new:
+                continue
+            # Keep the manifest's "current" in step with what is being served
+            promote(name, record["version"], manifest)
+    save_manifest(manifest)
+    return results
+
+
+def evaluate(name, manifest):
+    """Every stored version of `name` scored on the current holdout: [(version, rmse, rmse%)]."""
+    test = load_dataset(name, holdout=True)
+    scores = []
+    for v in manifest["models"][name]["versions"]:
+        model = CatBoostRegressor()
+        model.load_model(os.path.join(VERSIONS_DIR, v["file"]))
+        scores.append((v["version"], *_rmse(model, test)))
+    return scores, len(test)
+
+
+def format_report(manifest, names=None):
+    lines = [f"{'model':8} {'version':8} {'mode':8} {'rows':>7} {'new':>6} {'secs':>7} "
+             f"{'rmse':>9} {'rmse%':>7} {'prev%':>7}"]
+    for name in names or manifest["models"]:
+        entry = manifest["models"].get(name)
+        if not entry:
+            continue
+        for v in entry["versions"]:
+            marker = "*" if v["version"] == entry["current"] else " "
+            lines.append(
+                f"{name:8} {v['version'] + marker:8} {v['mode']:8} {v.get('rows_train', ''):>7} "
+                f"{v.get('rows_new', ''):>6} {v.get('train_seconds', ''):>7} {v.get('rmse') or '':>9} "
+                f"{v.get('rmse_percent') or '':>7} {v.get('previous_rmse_percent') or '':>7}"
+            )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Incremental retraining for the bill models.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("append", help="add labeled rows to a model's dataset store")
+    p.add_argument("name", choices=list(MODEL_FILES))
+    p.add_argument("path", help=".csv or .parquet in the training schema (with Total_Bill)")
+
+    p = sub.add_parser("train", help="train new versions (warm start by default)")
+    p.add_argument("names", nargs="*", help="tou, tiered and/or ulo (default: all)")
+    p.add_argument("--full", action="store_true", help="retrain from scratch on all rows")
+    p.add_argument("--threads", type=int, default=None, help="total CatBoost threads (default: CPUs)")
+    p.add_argument("--no-promote", action="store_true", help="store versions without serving them")
+
+    p = sub.add_parser("promote", help="serve a stored version (also used for rollback)")
+    p.add_argument("name", choices=list(MODEL_FILES))
+    p.add_argument("version")
+
+    p = sub.add_parser("report", help="print every version with its training time and RMSE")
+    p.add_argument("--evaluate", action="store_true", help="also score every version on the current holdout")
+    args = parser.parse_args(argv)
+
+    if args.command == "append":
+        manifest = load_manifest()
+        bootstrap(args.name, manifest)
+        save_manifest(manifest)
+        part = append_rows(args.name, args.path)
+        print(f"{args.name}: added {part}" if part else f"{args.name}: no labeled rows in {args.path}")
+    elif args.command == "train":
+        unknown = [n for n in args.names if n not in MODEL_FILES]
+        if unknown:
+            parser.error(f"unknown model(s): {', '.join(unknown)}")
+        results = retrain(args.names or None, args.full, args.threads, not args.no_promote)
+        for name, record in results.items():
+            if record is None:
+                print(f"{name}: no new data, kept {load_manifest()['models'][name]['current']}")
+        print(format_report(load_manifest(), [n for n, r in results.items() if r]))
+    elif args.command == "promote":
+        promote(args.name, args.version)
+        print(f"{args.name}: serving {args.version}")
+    else:
+        manifest = load_manifest()
+        print(format_report(manifest))
+        if args.evaluate:
+            for name in manifest["models"]:
+                scores, rows = evaluate(name, manifest)
+                print(f"\n{name}: holdout of {rows} rows")
+                for version, rmse, rmse_percent in scores:
+                    print(f"  {version:8} rmse {rmse}  rmse% {rmse_percent}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
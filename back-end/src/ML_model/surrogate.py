@@ -0,0 +1,202 @@
+"""
+Precomputed prediction grids for instant what-if queries.
+
+Each model is evaluated once over a quantized grid of its what-if inputs
+(residents, home size, kWh splits) for every Month x Postal_Code (FSA) seen in
+its training data. The grid is stored as a compact float32 .npz next to the
+model and queried by multilinear interpolation; anything outside the grid
+(unknown month/FSA, out-of-range values, non-default fixed inputs) falls back
+to the real CatBoost model.
+
+Build grids with:
+    python -m src.ML_model.surrogate build [tou tiered ulo]
+"""
+import os
+import sys
+import json
+import threading
+
+import numpy as np
+import pandas as pd
+from catboost import Pool
+
+from .registry import base_dir, model_path, registry, _file_sha256
+
+MONTHS = ["January", "February", "March", "April", "May", "June", "July",
+          "August", "September", "October", "November", "December"]
+
+PEOPLE = [1, 2, 3, 4, 5, 6]
+SQFT = [600, 1000, 1500, 2200, 3200]
+KWH = [0, 100, 200, 350, 500, 750, 1000]
+KWH_COARSE = [0, 200, 500, 1000]
+
+# Per model: training file (for the FSA list), grid axes, derived and fixed inputs.
+# Fixed values match what ML_total sends for inputs the UI does not collect.
+GRID_SPECS = {
+    "tou": {
+        "billing_type": "TOU",
+        "training_file": "TOU_HTV.txt",
+        "axes": {"Num_People": PEOPLE, "SqFt": SQFT, "On_Peak_kWh": KWH,
+                 "Mid_Peak_kWh": KWH, "Off_Peak_kWh": KWH},
+        "usage_from": ["On_Peak_kWh", "Mid_Peak_kWh", "Off_Peak_kWh"],
+        "fixed": {"Num_Children": 0, "Monthly_Income": 0, "Delivery_Charge": 0,
+                  "Regulatory_Charge": 0, "Rebate_Amount": 0},
+    },
+    "tiered": {
+        "billing_type": "Tiered",
+        "training_file": "Tiered_HTV.txt",
+        "axes": {"Num_People": PEOPLE, "SqFt": SQFT, "Lower_Tier_kWh": KWH,
+                 "Upper_Tier_kWh": KWH},
+        "usage_from": ["Lower_Tier_kWh", "Upper_Tier_kWh"],
+        "fixed": {"Num_Children": 0, "Monthly_Income": 0},
+    },
+    "ulo": {
+        "billing_type": "ULO",
+        "training_file": "ULO_HTV.txt",
+        "axes": {"Num_People": PEOPLE, "SqFt": SQFT, "Overnight_kWh": KWH_COARSE,
+                 "On_Peak_kWh": KWH_COARSE, "Mid_Peak_kWh": KWH_COARSE,
+                 "Off_Peak_kWh": KWH_COARSE},
+        "usage_from": ["Overnight_kWh", "On_Peak_kWh", "Mid_Peak_kWh", "Off_Peak_kWh"],
+        "fixed": {"Num_Children": 0, "Monthly_Income": 0},
+    },
+}
+
+BILLING_TYPE_NAMES = {spec["billing_type"]: name for name, spec in GRID_SPECS.items()}
+
+
+def surrogate_path(name):
+    return os.path.join(base_dir, f"{name}_surrogate.npz")
+
+
+def fsa(postal_code):
+    """Forward sortation area: first three characters of a Canadian postal code."""
+    return str(postal_code or "").replace(" ", "").upper()[:3]
+
+
+def build_surrogate(name, out_path=None):
+    """Evaluates the model over its grid and writes the .npz; returns the path."""
+    spec = GRID_SPECS[name]
+    path = model_path(name)
+    model = registry.get(path)
+    features = model.feature_names_
+    cat_idx = model.get_cat_feature_indices()
+
+    training = pd.read_csv(os.path.join(base_dir, spec["training_file"]))
+    fsas = sorted({fsa(p) for p in training["Postal_Code"].dropna()})
+
+    axis_names = list(spec["axes"])
+    axes = [np.asarray(spec["axes"][a], dtype=np.float64) for a in axis_names]
+    mesh = np.meshgrid(*axes, indexing="ij")
+    grid_shape = mesh[0].shape
+    columns = {a: m.ravel() for a, m in zip(axis_names, mesh)}
+    columns["Usage_kWh"] = sum(columns[a] for a in spec["usage_from"])
+    n = len(columns["Usage_kWh"])
+
+    values = np.empty((len(MONTHS), len(fsas)) + grid_shape, dtype=np.float32)
+    for mi, month in enumerate(MONTHS):
+        for fi, code in enumerate(fsas):
+            frame = {"Billing_Type": [spec["billing_type"]] * n, "Month": [month] * n,
+                     "Postal_Code": [code] * n}
+            frame.update(columns)
+            frame.update({k: np.full(n, v) for k, v in spec["fixed"].items()})
+            df = pd.DataFrame(frame)[features]
+            values[mi, fi] = model.predict(Pool(df, cat_features=cat_idx)).reshape(grid_shape)
+
+    out_path = out_path or surrogate_path(name)
+    meta = {"name": name, "axes": axis_names, "model_sha256": _file_sha256(path)}
+    np.savez_compressed(
+        out_path, values=values, months=np.array(MONTHS), fsas=np.array(fsas),
+        meta=np.array(json.dumps(meta)),
+        **{f"axis_{i}": a for i, a in enumerate(axes)},
+    )
+    return out_path
+
+
+class Surrogate:
+    def __init__(self, name, values, months, fsas, axes, model_sha256):
+        self.name = name
+        self.spec = GRID_SPECS[name]
+        self.values = values
+        self.month_index = {m: i for i, m in enumerate(months)}
+        self.fsa_index = {f: i for i, f in enumerate(fsas)}
+        self.axis_names = list(self.spec["axes"])
+        self.axes = axes
+        self.model_sha256 = model_sha256
+
+    @classmethod
+    def load(cls, name, path=None):
+        with np.load(path or surrogate_path(name)) as data:
+            meta = json.loads(str(data["meta"]))
+            axes = [data[f"axis_{i}"] for i in range(len(meta["axes"]))]
+            return cls(name, data["values"], [str(m) for m in data["months"]],
+                       [str(f) for f in data["fsas"]], axes, meta["model_sha256"])
+
+    def lookup(self, row):
+        """Interpolated prediction for a model-schema row, or None if it is off-grid."""
+        mi = self.month_index.get(row.get("Month"))
+        fi = self.fsa_index.get(fsa(row.get("Postal_Code")))
+        if mi is None or fi is None:
+            return None
+        for k, v in self.spec["fixed"].items():
+            if float(row.get(k) or 0) != v:
+                return None
+
+        coords = [float(row.get(a) or 0) for a in self.axis_names]
+        usage = sum(float(row.get(a) or 0) for a in self.spec["usage_from"])
+        if abs(float(row.get("Usage_kWh", usage) or 0) - usage) > 1e-6:
+            return None
+
+        cube = self.values[mi, fi]
+        index, weights = [], []
+        for axis, x in zip(self.axes, coords):
+            if x < axis[0] or x > axis[-1]:
+                return None
+            i = min(int(np.searchsorted(axis, x, side="right")) - 1, len(axis) - 2)
+            index.append(slice(i, i + 2))
+            weights.append((x - axis[i]) / (axis[i + 1] - axis[i]))
+
+        # Collapse the 2^d corner cube one axis at a time
+        cell = cube[tuple(index)].astype(np.float64)
+        for t in weights:
+            cell = cell[0] * (1 - t) + cell[1] * t
+        return float(cell)
+
+
+_loaded = {}
+_lock = threading.Lock()
+
+
+def get_surrogate(name):
+    """Loaded grid for `name`, or None if it was never built or the model changed since."""
+    with _lock:
+        if name not in _loaded:
+            path = surrogate_path(name)
+            _loaded[name] = Surrogate.load(name, path) if os.path.exists(path) else None
+        surrogate = _loaded[name]
+    if surrogate is None:
+        return None
+    registry.get_named(name)
+    if registry.loaded().get(os.path.abspath(model_path(name))) != surrogate.model_sha256:
+        return None
+    return surrogate
+
+
+def predict_what_if(row):
+    """Returns (predicted bill, "grid" | "model") for one model-schema row."""
+    name = BILLING_TYPE_NAMES.get(row.get("Billing_Type"))
+    surrogate = get_surrogate(name) if name else None
+    if surrogate is not None:
+        value = surrogate.lookup(row)
+        if value is not None:
+            return value, "grid"
+
+    from .callthemodel import predict_row
+    return predict_row(row), "model"
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "build":
+        print("usage: python -m src.ML_model.surrogate build [tou tiered ulo]")
+        sys.exit(1)
+    for model_name in sys.argv[2:] or list(GRID_SPECS):
+        print(f"Built {build_surrogate(model_name)}")
@@ -0,0 +1,270 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+
+from .cache import LRUCache, SingleFlight
+from .advice_stream import IncrementalAdviceParser, replay_events, summary_of
+from .local_advice import local_advice
+from .metrics import ADVICE_FALLBACKS, ADVICE_FIRST_TIP_SECONDS, CACHE_REQUESTS, stage_timer
+from . import gemini
+
+logger = logging.getLogger(__name__)
+
+# Keys that identify a request but do not change the advice
+IGNORED_KEYS = {"id", "year"}
+
+
+def _bucket(value):
+    """Round to 2 significant figures so similar bills share a key (847 -> 850, 0.203 -> 0.2)."""
+    if value == 0:
+        return 0
+    return float(f"{value:.2g}")
+
+
+def _to_number(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        try:
+            return float(value.replace(",", "").replace("$", "").strip())
+        except ValueError:
+            return None
+    return None
+
+
+def normalize_bill_data(value):
+    """Recursively normalize bill_data: bucket numbers, casefold strings, drop ids and blanks."""
+    if isinstance(value, dict):
+        out = {}
+        for k, v in value.items():
+            if k in IGNORED_KEYS:
+                continue
+            v = normalize_bill_data(v)
+            if v not in ("", None, [], {}):
+                out[k] = v
+        return out
+    if isinstance(value, list):
+        return [normalize_bill_data(v) for v in value]
+    number = _to_number(value)
+    if number is not None:
+        return _bucket(number)
+    if isinstance(value, str):
+        return value.strip().casefold()
+    return value
+
+
+def advice_cache_key(bill_data):
+    payload = json.dumps(
+        {
+            # Only what reaches the prompt, so e.g. the raw bill text cannot split the key
+            "bill": normalize_bill_data(gemini.compact_bill(bill_data)),
+            "prompt": gemini.PROMPT_VERSION,
+            "model": gemini.GEMINI_MODEL,
+            "schema": gemini.SCHEMA,
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def cacheable_part(advice):
+    """
+    What is shared between bills with the same key: the tips (with their
+    estimated savings) and subsidies. The headline numbers are per bill.
+    """
+    tips = advice.get("tips") or {}
+    return {
+        "tips": {"estimatedSavings": tips.get("estimatedSavings"), "tips": tips.get("tips") or []},
+        "subsidies": advice.get("subsidies") or [],
+    }
+
+
+def personalize(cached, local):
+    """Full advice from a cached entry plus the headline numbers local_advice computed for this bill."""
+    headline = local["tips"]
+    bill = headline["currentBill"]
+    savings = cached["tips"]["estimatedSavings"]
+    if not isinstance(savings, (int, float)):
+        savings = headline["estimatedSavings"]
+    return {
+        "tips": {
+            "currentUsage": headline["currentUsage"],
+            "currentBill": bill,
+            "estimatedSavings": savings,
+            "percentageSaving": int(round(savings / bill * 100)) if bill else 0,
+            "efficiencyScore": headline["efficiencyScore"],
+            "tips": cached["tips"]["tips"],
+        },
+        "subsidies": cached["subsidies"],
+    }
+
+
+class AdviceService:
+    """
+    Cached, coalesced front for call_gemini_api with a local fallback.
+    Only successful (dict, no "error") LLM responses are cached, and only
+    their tips and subsidies: bills that share a (rounded) key differ in
+    usage and cost, so hits and coalesced misses alike get those headline
+    numbers from local_advice for the caller's own bill. When the LLM
+    errors or misses `deadline` seconds, the rule-based local_advice answer is
+    returned instead; a late LLM answer still lands in the cache for next time.
+    """
+
+    def __init__(self, cache, call=None, stream=None, mode="llm", deadline=None,
+                 local=local_advice, local_first=True, workers=8):
+        self.cache = cache
+        self.call = call or gemini.call_gemini_api
+        self.stream = stream or gemini.stream_gemini_api
+        self.mode = mode  # "llm" | "local"
+        self.deadline = deadline
+        self.local = local
+        self.local_first = local_first
+        self.flight = SingleFlight()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="advice-llm")
+        self.hits = 0
+        self.misses = 0
+        self.fallbacks = 0
+        self._lock = threading.Lock()  # counters are bumped from request threads
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def get_advice(self, bill_data):
+        return self.get_advice_with_source(bill_data)[0]
+
+    def get_advice_with_source(self, bill_data):
+        """Returns (advice, source) with source "cache", "llm" or "local"."""
+        if self.mode == "local":
+            return self.local(bill_data), "local"
+
+        key = advice_cache_key(bill_data)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self._count("hits")
+            CACHE_REQUESTS.inc("advice", "hit")
+            return personalize(cached, self.local(bill_data)), "cache"
+        self._count("misses")
+        CACHE_REQUESTS.inc("advice", "miss")
+
+        # Coalesced callers share only the cacheable part; each personalizes it for its own bill
+        future = self._pool.submit(self.flight.do, key, lambda: self._fetch(key, bill_data))
+        try:
+            result = future.result(timeout=self.deadline)
+        except FuturesTimeout:
+            return self._fallback(bill_data, f"LLM missed the {self.deadline}s deadline")
+        except Exception as e:
+            return self._fallback(bill_data, f"Error calling the LLM: {e}")
+        if not isinstance(result, dict) or "error" in result:
+            return self._fallback(bill_data, result)
+        return personalize(result, self.local(bill_data)), "llm"
+
+    def _fallback(self, bill_data, reason):
+        self._count("fallbacks")
+        ADVICE_FALLBACKS.inc()
+        logger.warning("Serving local advice: %s", str(reason)[:300])
+        return self.local(bill_data), "local"
+
+    def _fetch(self, key, bill_data):
+        """Shared result of one coalesced miss: the cacheable part, or the LLM's error as-is."""
+        # A coalesced leader may start right after another leader filled the cache
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        result = self.call(bill_data)
+        if not isinstance(result, dict) or "error" in result:
+            return result
+        shared = cacheable_part(result)
+        self.cache.set(key, shared)
+        return shared
+
+    def stream_advice(self, bill_data):
+        """
+        Yields (event, payload). On a miss the local answer goes out first as
+        "local" (unless local_first is off), then "tip" and "subsidy" as each
+        LLM object completes, "summary" with the headline numbers and "done"
+        with the full advice and its source. Cache hits are replayed at once;
+        a completed stream fills the cache like get_advice. If the LLM fails,
+        "done" carries the local advice instead.
+        """
+        start = time.perf_counter()
+        if self.mode == "local":
+            source, events = "local", self._replay(self.local(bill_data), "local")
+        else:
+            key = advice_cache_key(bill_data)
+            cached = self.cache.get(key)
+            if cached is not None:
+                self._count("hits")
+                CACHE_REQUESTS.inc("advice", "hit")
+                source, events = "cache", self._replay(personalize(cached, self.local(bill_data)), "cache")
+            else:
+                self._count("misses")
+                CACHE_REQUESTS.inc("advice", "miss")
+                source, events = "llm", self._stream_llm(key, bill_data)
+
+        first_tip = True
+        for event, payload in events:
+            if event == "tip" and first_tip:
+                first_tip = False
+                ADVICE_FIRST_TIP_SECONDS.observe(time.perf_counter() - start, source)
+            yield event, payload
+
+    def _replay(self, advice, source):
+        yield from replay_events(advice)
+        yield "done", {"advice": advice, "source": source}
+
+    def _stream_llm(self, key, bill_data):
+        local = self.local(bill_data)
+        if self.local_first:
+            yield "local", {"advice": local, "source": "local"}
+
+        parser = IncrementalAdviceParser()
+        try:
+            with stage_timer("llm"):
+                for chunk in self.stream(bill_data):
+                    yield from parser.feed(chunk)
+            advice = parser.result()
+        except Exception as e:
+            self._count("fallbacks")
+            ADVICE_FALLBACKS.inc()
+            logger.warning("Advice stream failed, serving local advice: %s", e)
+            if self.local_first:
+                yield "summary", summary_of(local)
+            else:
+                yield from replay_events(local)
+            yield "done", {"advice": local, "source": "local", "error": f"Error streaming advice: {e}"}
+            return
+        self.cache.set(key, cacheable_part(advice))
+        yield "summary", summary_of(advice)
+        yield "done", {"advice": advice, "source": "llm"}
+
+    def stats(self):
+        with self._lock:
+            hits, misses, fallbacks = self.hits, self.misses, self.fallbacks
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "fallbacks": fallbacks,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self.cache),
+        }
+
+
+# ADVICE_MODE=local never calls the LLM; ADVICE_DEADLINE=0 waits for it indefinitely
+advice_service = AdviceService(
+    LRUCache(
+        int(os.getenv("ADVICE_CACHE_SIZE", "1024")),
+        ttl=float(os.getenv("ADVICE_CACHE_TTL", "86400")),
+    ),
+    mode=os.getenv("ADVICE_MODE", "llm"),
+    deadline=float(os.getenv("ADVICE_DEADLINE", "12")) or None,
+    local_first=os.getenv("ADVICE_STREAM_LOCAL_FIRST", "1") == "1",
+)
@@ -0,0 +1,93 @@
+import json
+
+# Paths (inside the advice JSON) of the objects emitted as soon as they close
+TIP_PATH = ("tips", "tips")
+SUBSIDY_PATH = ("subsidies",)
+SUMMARY_KEYS = ["currentUsage", "currentBill", "estimatedSavings", "percentageSaving", "efficiencyScore"]
+
+
+class IncrementalAdviceParser:
+    """
+    Scans the advice JSON as it streams in and returns every tip / subsidy
+    object the moment its closing brace arrives. Only tracks nesting, keys and
+    string state; each completed object is decoded from its own text slice.
+    """
+
+    def __init__(self):
+        self.buf = ""
+        self.pos = 0
+        self.in_string = False
+        self.escape = False
+        self.string_start = 0
+        # One entry per open container: [kind, key or index, start offset, expecting_key]
+        self.stack = []
+
+    def _path(self):
+        return tuple(entry[1] for entry in self.stack)
+
+    def feed(self, text):
+        """Adds a chunk; returns a list of ("tip" | "subsidy", dict) events."""
+        self.buf += text
+        events = []
+        buf = self.buf
+        for i in range(self.pos, len(buf)):
+            c = buf[i]
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif c == "\\":
+                    self.escape = True
+                elif c == '"':
+                    self.in_string = False
+                    top = self.stack[-1] if self.stack else None
+                    if top is not None and top[0] == "obj" and top[3]:
+                        top[1] = json.loads(buf[self.string_start:i + 1])
+                continue
+            if c == '"':
+                self.in_string = True
+                self.string_start = i
+            elif c == "{":
+                self.stack.append(["obj", None, i, True])
+            elif c == "[":
+                self.stack.append(["arr", 0, i, False])
+            elif c == ":" and self.stack:
+                self.stack[-1][3] = False
+            elif c == "," and self.stack:
+                top = self.stack[-1]
+                if top[0] == "obj":
+                    top[3] = True
+                else:
+                    top[1] += 1
+            elif c in "}]" and self.stack:
+                kind, _, start, _ = self.stack.pop()
+                if kind != "obj":
+                    continue
+                parent = self._path()[:-1]
+                if parent == TIP_PATH:
+                    events.append(("tip", json.loads(buf[start:i + 1])))
+                elif parent == SUBSIDY_PATH:
+                    events.append(("subsidy", json.loads(buf[start:i + 1])))
+        self.pos = len(buf)
+        return events
+
+    def result(self):
+        """The whole advice object once the stream has ended (raises if incomplete)."""
+        return json.loads(self.buf)
+
+
+def summary_of(advice):
+    tips = advice.get("tips") or {}
+    return {key: tips.get(key) for key in SUMMARY_KEYS}
+
+
+def replay_events(advice):
+    """Events for an already complete advice dict (cache hits)."""
+    for tip in (advice.get("tips") or {}).get("tips") or []:
+        yield "tip", tip
+    for subsidy in advice.get("subsidies") or []:
+        yield "subsidy", subsidy
+    yield "summary", summary_of(advice)
+
+
+def sse_format(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
@@ -0,0 +1,107 @@
+import json
+import time
+import threading
+from types import SimpleNamespace
+
+from .gemini import estimate_tokens
+
+# Schema-valid canned answer, shaped like gemini.SCHEMA
+SAMPLE_ADVICE = {
+    "tips": {
+        "currentUsage": 850,
+        "currentBill": 125.0,
+        "estimatedSavings": 20,
+        "percentageSaving": 16,
+        "efficiencyScore": 70,
+        "tips": [
+            {
+                "title": "Run big appliances off-peak",
+                "savings": "$8/month",
+                "description": "Use the dishwasher and laundry after 7 pm or on weekends.",
+                "cost": "$0",
+                "payback": "Immediate",
+                "category": "TOU",
+            },
+            {
+                "title": "Switch to LED bulbs",
+                "savings": "$5/month",
+                "description": "Replace your most used bulbs with LEDs.",
+                "cost": "$30 upfront",
+                "payback": "6 months",
+                "category": "Personal",
+            },
+            {
+                "title": "Set a smart thermostat schedule",
+                "savings": "$7/month",
+                "description": "Lower heating during peak hours when nobody is home.",
+                "cost": "$150 upfront",
+                "payback": "2 years",
+                "category": "Combined",
+            },
+        ],
+    },
+    "subsidies": [
+        {
+            "name": "Ontario Electricity Support Program (OESP)",
+            "amount": "$35–$75/month",
+            "description": "Monthly credit on electricity bills for lower-income households.",
+            "eligibility": "Household income below the OESP threshold for your household size.",
+            "howToApply": "Apply online at ontarioelectricitysupport.ca or call 1-855-831-8151.",
+            "status": "Available",
+            "url": "https://ontarioelectricitysupport.ca",
+        },
+        {
+            "name": "Low-income Energy Assistance Program (LEAP)",
+            "amount": "Up to $500",
+            "description": "One-time emergency help with overdue electricity bills.",
+            "eligibility": "Lower-income households behind on their bill.",
+            "howToApply": "Contact your local utility or a LEAP intake agency.",
+            "status": "Available",
+            "url": "https://www.oeb.ca/rates-and-your-bill/help-low-income-consumers",
+        },
+    ],
+}
+
+
+class FakeGenerativeModel:
+    """
+    Local stand-in for google.generativeai.GenerativeModel.
+    Returns `advice` as JSON text after `latency` seconds and counts calls,
+    so caching and coalescing can be exercised without network access.
+    With stream=True the text arrives in `chunk_chars` pieces over `latency`.
+    """
+
+    def __init__(self, advice=None, latency=0.0, chunk_chars=48):
+        self.advice = advice if advice is not None else SAMPLE_ADVICE
+        self.latency = latency
+        self.chunk_chars = chunk_chars
+        self.calls = 0
+        self.prompts = []
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt, generation_config=None, stream=False, **kwargs):
+        with self._lock:
+            self.calls += 1
+            self.prompts.append(prompt)
+        if stream:
+            return self._stream(prompt)
+        if self.latency:
+            time.sleep(self.latency)
+        text = json.dumps(self.advice)
+        return SimpleNamespace(text=text, candidates=[], usage_metadata=self._usage(prompt, text))
+
+    @staticmethod
+    def _usage(prompt, text):
+        return SimpleNamespace(prompt_token_count=estimate_tokens(str(prompt)),
+                               candidates_token_count=estimate_tokens(text))
+
+    def _stream(self, prompt):
+        # Same total latency as the blocking call, spread evenly over the chunks
+        text = json.dumps(self.advice, indent=1)
+        chunks = [text[i:i + self.chunk_chars] for i in range(0, len(text), self.chunk_chars)]
+        for i, chunk in enumerate(chunks):
+            if self.latency:
+                time.sleep(self.latency / len(chunks))
+            # Like Gemini, the last chunk carries the usage for the whole call
+            usage = self._usage(prompt, text) if i == len(chunks) - 1 else None
+            yield SimpleNamespace(text=chunk, candidates=[], usage_metadata=usage)
@@ -1,13 +1,42 @@
 import os
 import json
+import logging
+import threading
 from dotenv import load_dotenv
-import google.generativeai as genai
+
+from .metrics import LLM_TOKENS, stage_timer
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash") 
 
+# Bump when the prompt or SCHEMA changes so cached advice is not reused
+PROMPT_VERSION = "3"
+
+# One configured model object per process, reused across /advice requests
+_client = None
+_client_lock = threading.Lock()
+
+def set_client(client):
+    """Swap the LLM client (e.g. a FakeGenerativeModel); None resets to Gemini."""
+    global _client
+    with _client_lock:
+        _client = client
+
+def get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                # Imported on first use: google.generativeai takes ~1 s to import
+                import google.generativeai as genai
+                genai.configure(api_key=GEMINI_API_KEY)
+                _client = genai.GenerativeModel(GEMINI_MODEL, system_instruction=SYSTEM_INSTRUCTION)
+    return _client
+
 # Ultra-minimal schema (only widely accepted keys)
 SCHEMA = {
     "type": "object",
@@ -67,88 +96,124 @@ SCHEMA = {
     "required": ["tips", "subsidies"]
 }
 
+# Static instructions, sent once per model as the system instruction. The output
+# shape is enforced by SCHEMA (response_schema), so it is not repeated here.
+SYSTEM_INSTRUCTION = """
+You are an energy-cost assistant for Ontario, Canada. Grade-6 reading level, concise, no emojis.
+The user message is the household's bill as compact JSON: parsed fields (bill_type, *_kWh, *_Rate in $/kWh or cents, Total_Cost) and/or form entries in "bills" (billType, <period>Rate in $/kWh, <period>Total in kWh) plus homeInfo.
+Return JSON matching the response schema:
+- tips.tips: exactly 3 tips, one per category, no repeated ideas:
+  1. bill_type tip, category = bill_type ("TOU": shift use off-peak; "Tiered": stay in the lower tier; "Flat/ULO": cut total kWh).
+  2. "Personal": based on household size, home or appliances.
+  3. "Combined": uses both bill_type and personal info.
+  savings "$<n>/month"; description <= 20 words; cost "$<n> upfront" or "$0"; payback "Immediate", "<n> months" or "<n> years".
+- currentUsage: total monthly kWh (default 850). currentBill: total $ (default 125).
+- estimatedSavings: conservative whole $/month across all tips (they overlap, not a plain sum). percentageSaving = round(estimatedSavings / currentBill * 100). efficiencyScore: 0-100, conservative.
+- subsidies: 2-3 real Ontario electricity programs (e.g. OESP, LEAP, Energy Affordability Program). Never invent programs; one-sentence description; howToApply in one line; status "Available", "Paused" or "Varies"; official url, or "(check eligibility at official site)" if unsure.
+If a field is missing, infer gently.
+""".strip()
+
+# Only these fields reach the prompt; raw text, ids and blanks are dropped
+PARSED_FIELDS = ["bill_type", "month", "Peak_kWh", "Peak_Rate", "MidPeak_kWh", "MidPeak_Rate",
+                 "OffPeak_kWh", "OffPeak_Rate", "Tier1_kWh", "Tier1_Rate", "Tier2_kWh", "Tier2_Rate",
+                 "Total_kWh", "Rate", "Total_Cost", "residents", "homeSize", "ML_total"]
+FORM_FIELDS = ["month", "billType", "peakRate", "peakTotal", "midPeakRate", "midPeakTotal",
+               "offPeakRate", "offPeakTotal", "tier1Rate", "tier1Total", "tier2Rate", "tier2Total",
+               "flatRate", "flatTotal", "homeSize", "residents"]
+HOME_FIELDS = ["homeSize", "kindOfHome", "adults", "children", "annualIncome"]
+# Manual/demo payloads can carry a year of bills; the first few are enough for advice
+MAX_PROMPT_BILLS = int(os.getenv("ADVICE_PROMPT_BILLS", "3"))
+
+# The schema's answer (3 tips + 3 subsidies) is ~600 tokens. 2.5 models count
+# their thinking tokens against max_output_tokens, so the cap leaves headroom.
+ANSWER_TOKENS = 800
+MAX_OUTPUT_TOKENS = int(os.getenv("GEMINI_MAX_OUTPUT_TOKENS", "2048"))
+
+
+def _pick(data, fields):
+    out = {}
+    for key in fields:
+        value = data.get(key)
+        if isinstance(value, str):
+            value = value.strip()
+        if value not in (None, "", [], {}):
+            out[key] = value
+    return out
+
+
+def compact_bill(bill_data):
+    """The subset of bill_data the advice depends on (see PARSED_FIELDS / FORM_FIELDS)."""
+    if not isinstance(bill_data, dict):
+        return {}
+    # /analyze job results nest the parsed fields
+    if isinstance(bill_data.get("bill_data"), dict):
+        bill_data = {**bill_data["bill_data"], **{k: v for k, v in bill_data.items() if k != "bill_data"}}
+    out = _pick(bill_data, PARSED_FIELDS)
+    for key in ("bills", "data"):
+        bills = bill_data.get(key)
+        if isinstance(bills, list):
+            picked = [_pick(b, FORM_FIELDS) for b in bills[:MAX_PROMPT_BILLS] if isinstance(b, dict)]
+            if any(picked):
+                out["bills"] = [b for b in picked if b]
+                break
+    if isinstance(bill_data.get("homeInfo"), dict):
+        home = _pick(bill_data["homeInfo"], HOME_FIELDS)
+        if home:
+            out["homeInfo"] = home
+    return out
+
+
+def build_prompt(bill_data):
+    """User message: compact JSON of the fields the advice needs (instructions live in SYSTEM_INSTRUCTION)."""
+    return json.dumps(compact_bill(bill_data), separators=(",", ":"), ensure_ascii=False)
+
+
+def estimate_tokens(text):
+    """Offline token estimate (~4 characters per token for English and JSON)."""
+    return (len(text) + 3) // 4
+
+
+def generation_config():
+    # A plain dict (the SDK normalizes it like GenerationConfig), so fake or
+    # injected clients never pay the google.generativeai import
+    return {
+        "temperature": 0.3,
+        "top_p": 1,
+        "max_output_tokens": MAX_OUTPUT_TOKENS,
+        "response_mime_type": "application/json",
+        "response_schema": SCHEMA,  # minimal schema, no minItems/maxItems/etc.
+    }
+
+
+def _record_usage(response):
+    """Token counts from a response's usage_metadata into savewatt_llm_tokens."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return None
+    counts = {
+        "prompt": getattr(usage, "prompt_token_count", 0) or 0,
+        "response": getattr(usage, "candidates_token_count", 0) or 0,
+        "cached": getattr(usage, "cached_content_token_count", 0) or 0,
+        "thoughts": getattr(usage, "thoughts_token_count", 0) or 0,
+    }
+    for kind, count in counts.items():
+        if count or kind in ("prompt", "response"):
+            LLM_TOKENS.observe(count, kind)
+    logger.info("Gemini tokens: %s", counts)
+    return counts
+
 def call_gemini_api(bill_data):
-    if not GEMINI_API_KEY:
+    if not GEMINI_API_KEY and _client is None:
         return "Error: GEMINI_API_KEY is not set in your .env"
 
-    genai.configure(api_key=GEMINI_API_KEY)
-    model = genai.GenerativeModel(GEMINI_MODEL)
-
-    prompt = f"""
-    You are an energy-cost assistant for Ontario, Canada. Write at a grade-6 reading level. Be concise. No emojis.
-
-    CONTEXT (verbatim JSON from the app):
-    {bill_data}
-
-    RETURN FORMAT
-    Return ONLY valid JSON with this exact shape and key names:
-
-    {{
-    "tips": {{
-        "currentUsage": <integer>,            // parse from bill_data.data.monthlyUsage; default 850
-        "currentBill": <number>,              // parse from bill_data.data.monthlyBill; default 125
-        "estimatedSavings": <integer>,        // total realistic (slightly exagerrated) $/month from all tips (not a simple sum)
-        "percentageSaving": <integer>,        // round(estimatedSavings / currentBill * 100)
-        "efficiencyScore": <integer>,         // 0–100, conservative estimate
-        "tips": [
-        {{
-            "title": <string>,
-            "savings": <string>,              // "$<number>/month"
-            "description": <string>,          // 1–2 short sentences, ≤ 20 words total
-            "cost": <string>,                 // "$<number> upfront" or "$0"
-            "payback": <string>,              // "Immediate" | "<N> months" | "<N> years"
-            "category": <string>              // one of: ( "TOU" or "Tiered" or "Flat/ULO" ) | "Personal" | "Combined"
-        }}
-        // exactly 3 tips total, one per category listed above, no duplicates
-        ]
-    }},
-    "subsidies": [
-        {{
-        "name": <string>,
-        "amount": <string>,                 // e.g., "Up to $8,000"
-        "description": <string>,            // one concise sentence
-        "eligibility": <string>,            // short, plain criteria
-        "howToApply": <string>,             // short steps in one line; include phone/site if known
-        "status": <string>,                 // "Available" | "Paused" | "Varies"
-        "url": <string>                     // official link; if unsure use "(check eligibility at official site)"
-        }}
-        // 2–3 Ontario electricity affordability/efficiency programs
-    ]
-    }}
-
-    TASKS
-    1) If bill_type = "TOU": include 1 unique tip that shifts use to off-peak + low-cost actions. category="TOU".
-    2) If bill_type = "Tiered": include 1 unique tip to stay within lower-cost tier. category="Tiered".
-    3) If bill_type = "Flat/ULO": include 1 unique tip to reduce overall kWh. category="Flat/ULO".
-    4) Include 1 unique tip based on personal information (e.g., household size, appliances). category="Personal".
-    5) Include 1 unique tip that uses BOTH bill_type and personal info. category="Combined".
-    6) Add 2–3 Ontario assistance programs (e.g., OESP, LEAP, relevant rebates).
-    7) Add a short action-first summary (3–5 bullets).
-
-    RULES
-    - Ontario only for programs. Do not invent programs; if unsure, set url to "(check eligibility at official site)".
-    - Tips must be in concise, simple language and not repeat the same idea.
-    - If a field is missing, infer gently or use "not available".
-    - Output ONLY the JSON object, no markdown or extra text.
-
-    NUMBERS
-    - currentUsage = int(bill_data.data.monthlyUsage or 850)
-    - currentBill  = float(bill_data.data.monthlyBill or 125)
-    - estimatedSavings = conservative, whole dollars/month across all tips (consider overlap).
-    - percentageSaving = round(estimatedSavings / currentBill * 100).
-    """.strip()
+    model = get_client()
+
+    prompt = build_prompt(bill_data)
 
     try:
-        response = model.generate_content(
-            prompt,
-            generation_config=genai.types.GenerationConfig(
-                temperature=0.3,
-                top_p=1,
-                max_output_tokens=5000,
-                response_mime_type="application/json",
-                response_schema=SCHEMA,  # minimal schema, no minItems/maxItems/etc.
-            ),
-        )
+        with stage_timer("llm"):
+            response = model.generate_content(prompt, generation_config=generation_config())
+        _record_usage(response)
 
         # Primary path
         text = getattr(response, "text", None)
@@ -178,7 +243,7 @@ def call_gemini_api(bill_data):
 
             if str(finish_reason).endswith("MAX_TOKENS") or finish_reason == 2:
                 return ("Error: Model stopped at MAX_TOKENS and returned no JSON. "
-                        "Increase max_output_tokens or shorten the prompt/input.")
+                        "Raise GEMINI_MAX_OUTPUT_TOKENS or shorten the prompt/input.")
             if str(finish_reason).endswith("SAFETY"):
                 return "Error: Response blocked by safety filters."
 
@@ -186,3 +251,29 @@ def call_gemini_api(bill_data):
 
     except Exception as e:
         return f"Error calling Gemini: {e}"
+
+
+def stream_gemini_api(bill_data):
+    """
+    Same request as call_gemini_api, streamed: yields text chunks of the JSON
+    answer as the model produces them. Raises on API errors.
+    """
+    if not GEMINI_API_KEY and _client is None:
+        raise RuntimeError("GEMINI_API_KEY is not set in your .env")
+
+    model = get_client()
+    response = model.generate_content(
+        build_prompt(bill_data), generation_config=generation_config(), stream=True
+    )
+    last = None
+    for chunk in response:
+        last = chunk
+        try:
+            text = chunk.text
+        except ValueError:
+            # Chunks without text parts (e.g. the final finish_reason chunk)
+            continue
+        if text:
+            yield text
+    # usage_metadata on the final chunk covers the whole call
+    _record_usage(last)
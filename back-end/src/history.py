@@ -0,0 +1,329 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from datetime import date
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DB = os.path.join(BACKEND_DIR, "instance", "history.sqlite3")
+
+# Rolling aggregates cover the household's latest WINDOW billing months
+WINDOW = 12
+MONTH_NAMES = ["january", "february", "march", "april", "may", "june", "july",
+               "august", "september", "october", "november", "december"]
+
+# Summed per bill and kept per household over the rolling window
+SUMS = ["usage_kwh", "peak_kwh", "tou_kwh", "cost", "costed_kwh"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bills (
+    household TEXT NOT NULL,
+    month INTEGER NOT NULL,          -- year * 12 + (month - 1)
+    bill_type TEXT NOT NULL,
+    postal_code TEXT,
+    usage_kwh REAL NOT NULL,
+    peak_kwh REAL NOT NULL,          -- on-peak kWh (TOU bills only)
+    tou_kwh REAL NOT NULL,           -- usage_kwh of TOU bills, the peak share denominator
+    cost REAL NOT NULL,
+    costed_kwh REAL NOT NULL,        -- usage_kwh of bills with a cost, the $/kWh denominator
+    ml_total REAL,
+    bill_data TEXT NOT NULL,
+    stored_at REAL NOT NULL,
+    PRIMARY KEY (household, month, bill_type)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS bills_postal_month ON bills(postal_code, month);
+CREATE INDEX IF NOT EXISTS bills_type_month ON bills(bill_type, month);
+CREATE TABLE IF NOT EXISTS rollups (
+    household TEXT PRIMARY KEY,
+    bills INTEGER NOT NULL,
+    first_month INTEGER NOT NULL,
+    last_month INTEGER NOT NULL,
+    usage_kwh REAL NOT NULL,
+    peak_kwh REAL NOT NULL,
+    tou_kwh REAL NOT NULL,
+    cost REAL NOT NULL,
+    costed_kwh REAL NOT NULL,
+    last_ml_total REAL,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+def month_index(year, month):
+    return int(year) * 12 + int(month) - 1
+
+
+def month_label(index):
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def parse_month(value):
+    """'2025-01' -> month index (None if not that shape)."""
+    try:
+        year, month = str(value).strip().split("-")[:2]
+        if 1 <= int(month) <= 12:
+            return month_index(year, month)
+    except ValueError:
+        pass
+    return None
+
+
+def billing_month(bill_data, fields=None):
+    """
+    Month index of the bill: the month holding most of its parsed
+    Billing_Period, else a `billing_month` ("2025-01") or `month` (name,
+    abbreviation or number) plus `year` passed with the upload. None when the
+    month is unknown; the bill is then not stored.
+    """
+    period = bill_data.get("Billing_Period")
+    if isinstance(period, dict):
+        try:
+            start, end = (date.fromisoformat(period[k]) for k in ("start", "end"))
+        except (KeyError, TypeError, ValueError):
+            pass
+        else:
+            middle = start + (end - start) / 2
+            return month_index(middle.year, middle.month)
+    fields = fields or {}
+    index = parse_month(fields.get("billing_month") or "")
+    if index is not None:
+        return index
+    month = str(fields.get("month") or "").strip().lower()
+    year = str(fields.get("year") or "").strip()
+    number = int(month) if month.isdigit() else next(
+        (i + 1 for i, name in enumerate(MONTH_NAMES) if month and name.startswith(month[:3])), None)
+    if number is None or not 1 <= number <= 12 or not year.isdigit():
+        return None
+    return month_index(year, number)
+
+
+def household_key(fields):
+    """
+    The upload's `household` id (stripped, at most 64 chars); None without one.
+    Postal codes are shared by many homes, so they never identify a household.
+    """
+    key = str(fields.get("household") or "").strip()[:64]
+    return key or None
+
+
+def bill_measures(bill_data):
+    """Per-bill values that feed the rolling sums (see SUMS)."""
+    bill_type = bill_data.get("bill_type")
+    if bill_type == "TOU":
+        usage = sum(float(bill_data.get(k) or 0) for k in ("Peak_kWh", "MidPeak_kWh", "OffPeak_kWh"))
+    elif bill_type == "Tiered":
+        usage = sum(float(bill_data.get(k) or 0) for k in ("Tier1_kWh", "Tier2_kWh"))
+    else:
+        usage = float(bill_data.get("Total_kWh") or 0)
+    cost = float(bill_data.get("Total_Cost") or 0)
+    return {
+        "usage_kwh": usage,
+        "peak_kwh": float(bill_data.get("Peak_kWh") or 0) if bill_type == "TOU" else 0.0,
+        "tou_kwh": usage if bill_type == "TOU" else 0.0,
+        "cost": cost,
+        "costed_kwh": usage if cost else 0.0,
+    }
+
+
+class HistoryStore:
+    """
+    Household bill history in SQLite: one row per (household, billing month,
+    bill type), plus one rollup row per household holding sums over its latest
+    WINDOW months. Rollups are updated in the same transaction as each insert
+    (add the new bill, subtract a replaced one or the months that slid out of
+    the window), so reading a household's dashboard never scans its history.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(SCHEMA)
+            finally:
+                conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def record(self, household, month, bill_data, ml_total=None, postal_code=None):
+        """Upserts one bill and updates the household's rollup; returns the new rollup."""
+        measures = bill_measures(bill_data)
+        bill_type = bill_data.get("bill_type") or "unknown"
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            try:
+                # IMMEDIATE: other workers' writers wait, so rollups stay consistent across processes
+                conn.execute("BEGIN IMMEDIATE")
+                old = conn.execute(
+                    f"SELECT {', '.join(SUMS)} FROM bills WHERE household = ? AND month = ? AND bill_type = ?",
+                    (household, month, bill_type),
+                ).fetchone()
+                conn.execute(
+                    f"INSERT OR REPLACE INTO bills (household, month, bill_type, postal_code, {', '.join(SUMS)},"
+                    " ml_total, bill_data, stored_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (household, month, bill_type, postal_code, *(measures[k] for k in SUMS),
+                     ml_total, json.dumps(bill_data), now),
+                )
+                rollup = conn.execute("SELECT * FROM rollups WHERE household = ?", (household,)).fetchone()
+                rollup = self._apply(conn, household, rollup, month, measures, old, ml_total, now)
+                conn.execute(
+                    f"INSERT OR REPLACE INTO rollups (household, bills, first_month, last_month, {', '.join(SUMS)},"
+                    " last_ml_total, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (household, rollup["bills"], rollup["first_month"], rollup["last_month"],
+                     *(rollup[k] for k in SUMS), rollup["last_ml_total"], now),
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+            finally:
+                conn.close()
+        return summarize(rollup)
+
+    @staticmethod
+    def _apply(conn, household, rollup, month, measures, old, ml_total, now):
+        if rollup is None:
+            return {"bills": 1, "first_month": month, "last_month": month,
+                    "last_ml_total": ml_total, **measures}
+        rollup = dict(rollup)
+        if old is None:
+            rollup["bills"] += 1
+        rollup["first_month"] = min(rollup["first_month"], month)
+
+        last = rollup["last_month"]
+        if month > last:
+            # Window slides forward: drop the months that fall out (at most WINDOW rows, via the primary key)
+            dropped = conn.execute(
+                f"SELECT {', '.join(f'COALESCE(SUM({k}), 0) AS {k}' for k in SUMS)} FROM bills"
+                " WHERE household = ? AND month BETWEEN ? AND ?",
+                (household, last - WINDOW + 1, month - WINDOW),
+            ).fetchone()
+            for k in SUMS:
+                rollup[k] += measures[k] - dropped[k]
+            rollup["last_month"] = month
+        elif month > last - WINDOW:
+            for k in SUMS:
+                rollup[k] += measures[k] - (old[k] if old is not None else 0)
+        if month >= rollup["last_month"] and ml_total is not None:
+            rollup["last_ml_total"] = ml_total
+        return rollup
+
+    def rollup(self, household):
+        with self._lock:
+            conn = self._connect()
+            try:
+                row = conn.execute("SELECT * FROM rollups WHERE household = ?", (household,)).fetchone()
+            finally:
+                conn.close()
+        return summarize(dict(row)) if row is not None else None
+
+    def bills(self, household=None, postal_code=None, bill_type=None, start=None, end=None, limit=WINDOW):
+        """Newest-first bills for a household (or postal code), optionally by type and month range."""
+        where, params = [], []
+        if household is not None:
+            where.append("household = ?")
+            params.append(household)
+        if postal_code is not None:
+            where.append("postal_code = ?")
+            params.append(postal_code)
+        if bill_type is not None:
+            where.append("bill_type = ?")
+            params.append(bill_type)
+        if start is not None:
+            where.append("month >= ?")
+            params.append(start)
+        if end is not None:
+            where.append("month <= ?")
+            params.append(end)
+        sql = ("SELECT household, month, bill_type, usage_kwh, peak_kwh, cost, ml_total, bill_data FROM bills"
+               + (" WHERE " + " AND ".join(where) if where else "") + " ORDER BY month DESC LIMIT ?")
+        with self._lock:
+            conn = self._connect()
+            try:
+                rows = conn.execute(sql, (*params, limit)).fetchall()
+            finally:
+                conn.close()
+        return [{
+            "household": r["household"],
+            "month": month_label(r["month"]),
+            "bill_type": r["bill_type"],
+            "usage_kwh": round(r["usage_kwh"], 3),
+            "peak_kwh": round(r["peak_kwh"], 3),
+            "cost": round(r["cost"], 2),
+            "ml_total": r["ml_total"],
+            "bill_data": json.loads(r["bill_data"]),
+        } for r in rows]
+
+    def clear(self):
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute("DELETE FROM bills")
+                conn.execute("DELETE FROM rollups")
+            finally:
+                conn.close()
+
+
+def summarize(rollup):
+    """Dashboard view of a rollup row: 12-month totals and the derived ratios."""
+    usage, tou, costed = rollup["usage_kwh"], rollup["tou_kwh"], rollup["costed_kwh"]
+    return {
+        "bills": rollup["bills"],
+        "first_month": month_label(rollup["first_month"]),
+        "last_month": month_label(rollup["last_month"]),
+        "window_months": WINDOW,
+        "usage_kwh_12m": round(usage, 3),
+        "cost_12m": round(rollup["cost"], 2),
+        "peak_share_12m": round(rollup["peak_kwh"] / tou, 4) if tou > 1e-9 else None,
+        "avg_cost_per_kwh_12m": round(rollup["cost"] / costed, 4) if costed > 1e-9 else None,
+        "last_ml_total": rollup["last_ml_total"],
+    }
+
+
+def record_analysis(bill_data, fields, ml_total=None):
+    """
+    Stores a parsed /analyze result under the household in `fields`. Skipped
+    (returns None) when history is disabled, the bill did not parse, no
+    household id was given or the billing month is unknown. Never raises:
+    history is best-effort.
+    """
+    if history_store is None or not isinstance(bill_data, dict) or "error" in bill_data:
+        return None
+    household = household_key(fields)
+    if household is None:
+        return None
+    month = billing_month(bill_data, fields)
+    if month is None:
+        logger.info("Bill for %s has no billing period; not stored in history", household)
+        return None
+    try:
+        postal = fields.get("zipCode") or fields.get("postal_code")
+        return history_store.record(
+            household, month, bill_data, ml_total,
+            postal_code="".join(str(postal).split()).upper() if postal else None,
+        )
+    except Exception:
+        logger.exception("Could not record bill history for %s", household)
+        return None
+
+
+def build_history_store():
+    """HISTORY_DB: SQLite path (default instance/history.sqlite3; empty disables history)."""
+    path = os.getenv("HISTORY_DB", DEFAULT_DB)
+    return HistoryStore(path) if path else None
+
+
+history_store = build_history_store()
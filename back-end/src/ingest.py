@@ -0,0 +1,271 @@
+"""
+Bulk bill ingestion for backfilling archived statements.
+
+Walks a directory (or reads a manifest of paths, one per line), parses every PDF
+across a process pool and appends one record per file to JSONL or Parquet.
+Completed paths are appended to a checkpoint file after each flush, so an
+interrupted run picks up where it stopped when started again with the same
+arguments. A failing file is recorded with its error and the run continues;
+the checkpoint marks it failed, and --retry-failed runs it again.
+
+Run from back-end/:
+    python -m src.ingest /archive/bills --out bills.jsonl
+    python -m src.ingest --manifest paths.txt --out bills_parquet --format parquet --workers 8
+"""
+import io
+import os
+import sys
+import json
+import time
+import hashlib
+import logging
+import argparse
+import multiprocessing
+
+from .parse import PARSER_VERSION, extract_bill_data_from_pdf, parse_bill_data
+from .ocr_local import ocr_pdf_to_text
+
+logger = logging.getLogger(__name__)
+
+# Columns written to Parquet; bill_data is kept as a JSON string since its keys vary by bill type
+PARQUET_COLUMNS = ["path", "sha256", "bill_type", "bill_data", "pages", "source",
+                   "error", "seconds", "parser_version"]
+
+
+def iter_pdf_paths(root=None, manifest=None):
+    """Yields PDF paths from a manifest file or, recursively and sorted, from a directory."""
+    if manifest:
+        with open(manifest, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    yield line
+        return
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if filename.lower().endswith(".pdf"):
+                yield os.path.join(dirpath, filename)
+
+
+def ingest_file(path, page_budget=None, ocr=True):
+    """Worker: parse one PDF into a flat record. Never raises; failures go in "error"."""
+    start = time.perf_counter()
+    record = {"path": path, "sha256": None, "bill_type": None, "bill_data": None, "pages": 0,
+              "source": "text", "error": None, "parser_version": PARSER_VERSION}
+    try:
+        with open(path, "rb") as f:
+            pdf_bytes = f.read()
+        record["sha256"] = hashlib.sha256(pdf_bytes).hexdigest()
+
+        text, bill_data, record["pages"] = extract_bill_data_from_pdf(io.BytesIO(pdf_bytes), page_budget)
+        if bill_data is None and ocr:
+            # Scanned statement: OCR pages sequentially, the pool already uses every core
+            text = ocr_pdf_to_text(pdf_bytes, psm=6, max_pages=page_budget, parallel=False)
+            record["source"] = "ocr"
+            bill_data = parse_bill_data(text) if text else None
+
+        if bill_data is None:
+            record["error"] = "No text found in PDF"
+        elif "error" in bill_data:
+            record["error"] = bill_data["error"]
+        else:
+            record["bill_type"] = bill_data.get("bill_type")
+            record["bill_data"] = bill_data
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["seconds"] = round(time.perf_counter() - start, 4)
+    return record
+
+
+def _ingest_args(args):
+    return ingest_file(*args)
+
+
+class JSONLWriter:
+    def __init__(self, path):
+        self.f = open(path, "a", encoding="utf-8")
+
+    def write(self, records):
+        for record in records:
+            self.f.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self.f.flush()
+        os.fsync(self.f.fileno())
+
+    def close(self):
+        self.f.close()
+
+
+class ParquetWriter:
+    """Writes each flushed batch as a new part file in `path` (a directory), so resuming only appends parts."""
+
+    def __init__(self, path):
+        import pyarrow  # noqa: F401  (fail fast before any work is done)
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.part = len([n for n in os.listdir(path) if n.endswith(".parquet")])
+
+    def write(self, records):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        columns = {c: [] for c in PARQUET_COLUMNS}
+        for record in records:
+            for c in PARQUET_COLUMNS:
+                value = record.get(c)
+                columns[c].append(json.dumps(value) if c == "bill_data" and value is not None else value)
+        schema = pa.schema([
+            ("path", pa.string()), ("sha256", pa.string()), ("bill_type", pa.string()),
+            ("bill_data", pa.string()), ("pages", pa.int32()), ("source", pa.string()),
+            ("error", pa.string()), ("seconds", pa.float64()), ("parser_version", pa.string()),
+        ])
+        out = os.path.join(self.path, f"part-{self.part:05d}.parquet")
+        pq.write_table(pa.table(columns, schema=schema), out + ".tmp")
+        os.replace(out + ".tmp", out)
+        self.part += 1
+
+    def close(self):
+        pass
+
+
+class Checkpoint:
+    """
+    Append-only log of finished paths, one "ok<TAB>path" or "failed<TAB>path"
+    line each, written only after their records are flushed. Successes are
+    never redone; failures are retried when the run asks for it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        self.failed = set()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    line = line.rstrip("\n")
+                    if not line.strip():
+                        continue
+                    # Lines without a status come from older checkpoints, which only logged successes
+                    status, _, entry = line.partition("\t") if "\t" in line else ("ok", "", line)
+                    if status == "ok":
+                        self.done.add(entry)
+                        self.failed.discard(entry)
+                    elif entry not in self.done:
+                        self.failed.add(entry)
+        self.f = open(path, "a", encoding="utf-8")
+
+    def mark(self, records):
+        lines = [f"{'failed' if r['error'] else 'ok'}\t{r['path']}\n" for r in records]
+        self.f.write("".join(lines))
+        self.f.flush()
+        os.fsync(self.f.fileno())
+        for r in records:
+            if r["error"]:
+                self.failed.add(r["path"])
+            else:
+                self.done.add(r["path"])
+                self.failed.discard(r["path"])
+
+    def close(self):
+        self.f.close()
+
+
+def run_ingest(paths, out, fmt="jsonl", checkpoint_path=None, workers=None, chunksize=8,
+               flush_every=100, page_budget=None, ocr=True, progress_every=1000, retry_failed=False):
+    """
+    Parses `paths` over a process pool and writes records to `out`.
+    Paths that failed in an earlier run are skipped unless `retry_failed`
+    (their new record is appended; the latest record for a path wins).
+    Returns a summary dict (processed, failed, skipped, skipped_failed, seconds, pdfs_per_sec).
+    """
+    checkpoint = Checkpoint(checkpoint_path or out.rstrip("/\\") + ".checkpoint")
+    writer = ParquetWriter(out) if fmt == "parquet" else JSONLWriter(out)
+    workers = workers or os.cpu_count() or 2
+
+    skipped = skipped_failed = 0
+    def pending():
+        nonlocal skipped, skipped_failed
+        for path in paths:
+            if path in checkpoint.done:
+                skipped += 1
+                continue
+            if path in checkpoint.failed and not retry_failed:
+                skipped_failed += 1
+                continue
+            yield (path, page_budget, ocr)
+
+    processed = failed = 0
+    batch = []
+    start = time.perf_counter()
+
+    def flush():
+        if batch:
+            writer.write(batch)
+            checkpoint.mark(batch)
+            batch.clear()
+
+    try:
+        with multiprocessing.Pool(workers) as pool:
+            # imap_unordered hands out `chunksize` files at a time and streams results back
+            for record in pool.imap_unordered(_ingest_args, pending(), chunksize=chunksize):
+                processed += 1
+                if record["error"]:
+                    failed += 1
+                    logger.warning("%s: %s", record["path"], record["error"])
+                batch.append(record)
+                if len(batch) >= flush_every:
+                    flush()
+                if processed % progress_every == 0:
+                    elapsed = time.perf_counter() - start
+                    logger.info("%d PDFs (%d failed) in %.1fs, %.1f PDFs/sec",
+                                processed, failed, elapsed, processed / elapsed)
+    finally:
+        # On Ctrl-C keep whatever already finished; successes are skipped next time
+        flush()
+        writer.close()
+        checkpoint.close()
+
+    elapsed = time.perf_counter() - start
+    return {
+        "processed": processed,
+        "failed": failed,
+        "skipped": skipped,
+        "skipped_failed": skipped_failed,
+        "seconds": round(elapsed, 2),
+        "pdfs_per_sec": round(processed / elapsed, 2) if elapsed > 0 else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parse a directory or manifest of bill PDFs in bulk.")
+    parser.add_argument("root", nargs="?", help="directory to scan recursively for *.pdf")
+    parser.add_argument("--manifest", help="file with one PDF path per line (instead of a directory)")
+    parser.add_argument("--out", required=True, help="JSONL file, or directory of part files for parquet")
+    parser.add_argument("--format", choices=["jsonl", "parquet"], default="jsonl")
+    parser.add_argument("--checkpoint", help="finished-path log (default: <out>.checkpoint)")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    parser.add_argument("--chunksize", type=int, default=8, help="files handed to a worker at a time")
+    parser.add_argument("--flush-every", type=int, default=100, help="records per write + checkpoint")
+    parser.add_argument("--page-budget", type=int, default=None, help="max pages to read per PDF")
+    parser.add_argument("--no-ocr", action="store_true", help="skip OCR fallback for scanned PDFs")
+    parser.add_argument("--progress-every", type=int, default=1000)
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="re-run files that failed in an earlier run (e.g. after transient I/O errors)")
+    args = parser.parse_args(argv)
+    if not args.root and not args.manifest:
+        parser.error("give a directory or --manifest")
+
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(),
+                        format="%(asctime)s %(levelname)s %(message)s")
+    summary = run_ingest(
+        iter_pdf_paths(args.root, args.manifest), args.out, fmt=args.format,
+        checkpoint_path=args.checkpoint, workers=args.workers, chunksize=args.chunksize,
+        flush_every=args.flush_every, page_budget=args.page_budget, ocr=not args.no_ocr,
+        progress_every=args.progress_every, retry_failed=args.retry_failed,
+    )
+    print(json.dumps(summary))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,342 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .advice_cache import advice_service
+from .cache import analyze_cache
+from .history import record_analysis
+from .ocr_local import ocr_pdf_to_text
+from .parse import PARSER_VERSION, extract_bill_data_from_pdf, parse_bill_data
+from .ML_model.callthemodel import ML_total
+
+logger = logging.getLogger(__name__)
+
+STAGES = ["extract", "ocr", "parse", "predict", "advice"]
+
+# Pool sizes and per-stage concurrency limits (env overrides)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "8"))
+STAGE_LIMITS = {
+    "extract": int(os.getenv("JOB_LIMIT_EXTRACT", "4")),
+    "ocr": int(os.getenv("JOB_LIMIT_OCR", "2")),
+    "parse": int(os.getenv("JOB_LIMIT_PARSE", "8")),
+    "predict": int(os.getenv("JOB_LIMIT_PREDICT", "4")),
+    "advice": int(os.getenv("JOB_LIMIT_ADVICE", "16")),
+}
+# Finished jobs are forgotten after this many seconds
+JOB_TTL = float(os.getenv("JOB_TTL", "3600"))
+# SQLite file shared by all web workers (unset = this process only). serve.py
+# sets one when it runs several workers, since a poll can reach any of them.
+JOB_STORE_DB = os.getenv("JOB_STORE_DB")
+# How often a worker that does not own a job re-reads it from the store
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "0.2"))
+
+
+class Job:
+    def __init__(self, fields, store=None):
+        self.store = store
+        self.id = uuid.uuid4().hex
+        self.fields = fields
+        self.created_at = time.time()
+        self.finished_at = None
+        self.status = "queued"
+        self.stages = {name: {"status": "pending"} for name in STAGES}
+        self.events = []  # (event name, payload) in the order they happened
+        self._cond = threading.Condition()
+
+    def _emit(self, event, payload):
+        with self._cond:
+            self.events.append((event, payload))
+            if self.store is not None:
+                self.store.save(self, event=(len(self.events) - 1, event, payload))
+            self._cond.notify_all()
+
+    def stage_started(self, name):
+        self.stages[name] = {"status": "running"}
+        if self.store is not None:
+            self.store.save(self)
+
+    def stage_done(self, name, status, result=None, error=None, started=None):
+        stage = {"status": status}
+        if result is not None:
+            stage["result"] = result
+        if error is not None:
+            stage["error"] = error
+        if started is not None:
+            stage["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        self.stages[name] = stage
+        self._emit(name, stage)
+
+    def finish(self, status):
+        self.status = status
+        self.finished_at = time.time()
+        self._emit("done", {"status": status})
+
+    def wait_events(self, start, timeout):
+        """Events after index `start`, blocking up to `timeout` seconds for new ones."""
+        with self._cond:
+            if len(self.events) <= start and self.finished_at is None:
+                self._cond.wait(timeout)
+            return self.events[start:]
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "stages": self.stages,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+def _count(value):
+    """Form counts arrive as strings ("2", "2.5", ""); anything unparsable counts as 0."""
+    try:
+        return max(0, int(float(value or 0)))
+    except (TypeError, ValueError):
+        return 0
+
+
+def frontend_input(bill_data, fields):
+    """Maps a parsed TOU bill + form fields to the dict ML_total expects."""
+    residents = sum(_count(fields.get(k)) for k in ("adults", "children")) or _count(fields.get("residents"))
+    return {
+        "month": fields.get("month", ""),
+        "zipCode": fields.get("zipCode", ""),
+        "homeSize": fields.get("homeSize") or 0,
+        "residents": residents,
+        "peakTotal": bill_data.get("Peak_kWh", 0),
+        "midPeakTotal": bill_data.get("MidPeak_kWh", 0),
+        "offPeakTotal": bill_data.get("OffPeak_kWh", 0),
+    }
+
+
+def tou_score(bill_data, fields):
+    """ML_total score for a parsed TOU bill; None for other bill types or no peak usage."""
+    if bill_data.get("bill_type") != "TOU":
+        return None
+    score = ML_total(frontend_input(bill_data, fields))
+    return float(score) if score is not None else None
+
+
+class StoredJob:
+    """Read-only view of a job owned by another worker process, polled from the store."""
+
+    def __init__(self, store, row):
+        self.store = store
+        self.id = row["id"]
+        self._row = row
+
+    def to_dict(self):
+        row = self._row
+        return {
+            "job_id": row["id"],
+            "status": row["status"],
+            "stages": json.loads(row["stages"]),
+            "created_at": row["created_at"],
+            "finished_at": row["finished_at"],
+        }
+
+    def wait_events(self, start, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            events = self.store.events(self.id, start)
+            if events or time.monotonic() >= deadline:
+                return events
+            time.sleep(JOB_POLL_SECONDS)
+
+
+class SQLiteJobStore:
+    """Job status, stages and events in SQLite, so any web worker can answer /jobs/<id>."""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY, status TEXT NOT NULL, stages TEXT NOT NULL,"
+                " created_at REAL NOT NULL, finished_at REAL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS job_events ("
+                " job_id TEXT NOT NULL, seq INTEGER NOT NULL, event TEXT NOT NULL, payload TEXT NOT NULL,"
+                " PRIMARY KEY (job_id, seq)) WITHOUT ROWID"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_finished_at ON jobs(finished_at)")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def save(self, job, event=None):
+        """Upserts the job row and, with `event` = (seq, name, payload), appends that event."""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO jobs (id, status, stages, created_at, finished_at) VALUES (?, ?, ?, ?, ?)",
+                (job.id, job.status, json.dumps(job.stages), job.created_at, job.finished_at),
+            )
+            if event is not None:
+                seq, name, payload = event
+                conn.execute("INSERT OR REPLACE INTO job_events (job_id, seq, event, payload) VALUES (?, ?, ?, ?)",
+                             (job.id, seq, name, json.dumps(payload)))
+
+    def get(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return StoredJob(self, row) if row is not None else None
+
+    def events(self, job_id, start):
+        with self._connect() as conn:
+            rows = conn.execute("SELECT event, payload FROM job_events WHERE job_id = ? AND seq >= ? ORDER BY seq",
+                                (job_id, start)).fetchall()
+        return [(row["event"], json.loads(row["payload"])) for row in rows]
+
+    def expire(self, cutoff):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM job_events WHERE job_id IN (SELECT id FROM jobs WHERE finished_at < ?)",
+                         (cutoff,))
+            conn.execute("DELETE FROM jobs WHERE finished_at < ?", (cutoff,))
+
+
+class JobManager:
+    """
+    Runs the PDF -> text -> parse -> predict -> advice pipeline off the request
+    thread. Jobs run on a bounded thread pool; OCR (CPU-bound) fans pages out
+    to ocr_local's process pool; each stage is additionally capped by its own
+    semaphore. With a `store`, job state is also written there so that other
+    worker processes can serve status and events for jobs they did not run.
+    """
+
+    def __init__(self, workers=JOB_WORKERS, limits=None, store=None):
+        self.store = store
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._threads = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._limits = {name: threading.BoundedSemaphore(n)
+                        for name, n in (limits or STAGE_LIMITS).items()}
+
+    def submit(self, upload, digest, fields):
+        """Takes ownership of `upload` (a file-like from read_upload) and closes it."""
+        job = Job(fields, store=self.store)
+        with self._lock:
+            self._expire()
+            self._jobs[job.id] = job
+        if self.store is not None:
+            self.store.save(job)
+        self._threads.submit(self._run, job, upload, digest)
+        return job
+
+    def get(self, job_id):
+        """This process's Job, else (with a store) a StoredJob view of another worker's job."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None and self.store is not None:
+            job = self.store.get(job_id)
+        return job
+
+    def _expire(self):
+        cutoff = time.time() - JOB_TTL
+        for job_id in [j.id for j in self._jobs.values()
+                       if j.finished_at is not None and j.finished_at < cutoff]:
+            del self._jobs[job_id]
+        if self.store is not None:
+            self.store.expire(cutoff)
+
+    def _stage(self, job, name, fn):
+        with self._limits[name]:
+            started = time.perf_counter()
+            job.stage_started(name)
+            try:
+                result = fn()
+            except Exception as e:
+                job.stage_done(name, "error", error=str(e), started=started)
+                raise
+            job.stage_done(name, "done", result=result, started=started)
+            return result
+
+    def _run(self, job, upload, digest):
+        with upload:
+            self._run_stages(job, upload, digest)
+
+    def _run_stages(self, job, upload, digest):
+        job.status = "running"
+        if job.store is not None:
+            job.store.save(job)
+        try:
+            cache_key = f"{PARSER_VERSION}:{digest}"
+            cached = analyze_cache.get(cache_key)
+
+            if cached is not None:
+                text, bill_data = cached["text"], cached["bill_data"]
+                job.stage_done("extract", "cached", result={"chars": len(text)})
+                job.stage_done("ocr", "skipped")
+                job.stage_done("parse", "cached", result=bill_data)
+            else:
+                extracted = {}
+
+                def extract():
+                    text, extracted["bill_data"], pages = extract_bill_data_from_pdf(upload)
+                    extracted["text"] = text
+                    return {"chars": len(text), "pages": pages}
+
+                self._stage(job, "extract", extract)
+                text, bill_data = extracted["text"], extracted["bill_data"]
+
+                if text == "":
+                    text = self._stage(job, "ocr", lambda: ocr_pdf_to_text(upload, psm=6))
+                    bill_data = None
+                else:
+                    job.stage_done("ocr", "skipped")
+
+                bill_data = self._stage(
+                    job, "parse", lambda: bill_data if bill_data is not None else parse_bill_data(text)
+                )
+                analyze_cache.set(cache_key, {"text": text, "bill_data": bill_data})
+
+            if "error" in bill_data:
+                job.stage_done("predict", "skipped")
+                job.stage_done("advice", "skipped")
+                job.finish("error")
+                return
+
+            score = None
+            if bill_data.get("bill_type") == "TOU":
+                try:
+                    score = self._stage(job, "predict", lambda: {"score": tou_score(bill_data, job.fields)})["score"]
+                except Exception:
+                    # Stage is already marked "error"; advice does not need the score
+                    logger.exception("Predict stage failed for job %s", job.id)
+            else:
+                job.stage_done("predict", "skipped")
+            record_analysis(bill_data, job.fields, score)
+
+            self._stage(job, "advice",
+                        lambda: advice_service.get_advice({**bill_data, "homeInfo": job.fields}))
+            job.finish("done")
+        except Exception:
+            job.finish("error")
+
+
+def sse_stream(job, heartbeat=15):
+    """Server-sent events: one event per finished stage, then `done`."""
+    sent = 0
+    while True:
+        events = job.wait_events(sent, heartbeat)
+        if not events:
+            yield ": keep-alive\n\n"
+            continue
+        for event, payload in events:
+            yield f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+            if event == "done":
+                return
+        sent += len(events)
+
+
+job_manager = JobManager(store=SQLiteJobStore(JOB_STORE_DB) if JOB_STORE_DB else None)
@@ -0,0 +1,242 @@
+"""
+Rule-based advice in the same shape as gemini.SCHEMA.
+
+Used when the LLM is disabled, errors or misses the /advice deadline. Numbers
+come from the bill (parsed /analyze output or the manual/demo form data) with
+the same defaults the LLM prompt uses; tips are templates per bill type. Like
+the parser's *_kWh fields, the form's <period>Total values are kWh.
+"""
+
+# Approximate Ontario RPP prices ($/kWh), used when the bill does not carry its own rates
+TOU_RATES = {"on": 0.158, "mid": 0.122, "off": 0.076}
+TIERED_RATES = {"lower": 0.093, "upper": 0.110}
+FLAT_RATE = 0.13
+# Lower-tier threshold per month: 1,000 kWh Nov-Apr, 600 kWh May-Oct
+WINTER_MONTHS = {"november", "december", "january", "february", "march", "april"}
+
+DEFAULT_USAGE = 850
+DEFAULT_BILL = 125.0
+
+SUBSIDIES = [
+    {
+        "name": "Ontario Electricity Support Program (OESP)",
+        "amount": "$35–$113/month",
+        "description": "Monthly credit on electricity bills for lower-income households.",
+        "eligibility": "Household income under the OESP limit for your household size.",
+        "howToApply": "Apply online at ontarioelectricitysupport.ca or call 1-855-831-8151.",
+        "status": "Available",
+        "url": "https://ontarioelectricitysupport.ca",
+    },
+    {
+        "name": "Low-income Energy Assistance Program (LEAP)",
+        "amount": "Up to $500 ($600 if electrically heated)",
+        "description": "One-time emergency help with overdue electricity bills.",
+        "eligibility": "Lower-income households that are behind on their bill.",
+        "howToApply": "Contact your utility or a local LEAP intake agency.",
+        "status": "Available",
+        "url": "https://www.oeb.ca/consumer-information-and-protection/bill-assistance-programs",
+    },
+    {
+        "name": "Energy Affordability Program",
+        "amount": "Free upgrades",
+        "description": "Free energy-saving products and home upgrades for eligible households.",
+        "eligibility": "Income-qualified Ontario households or OESP recipients.",
+        "howToApply": "Check eligibility and apply at saveonenergy.ca.",
+        "status": "Available",
+        "url": "https://saveonenergy.ca/For-Your-Home/Energy-Affordability-Program",
+    },
+]
+
+
+def _num(value):
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).replace(",", "").replace("$", "").strip())
+    except ValueError:
+        return None
+
+
+def _first_bill(bill_data):
+    """The manual/demo payloads carry a list of monthly bills; use the first."""
+    for key in ("bills", "data"):
+        bills = bill_data.get(key)
+        if isinstance(bills, list) and bills and isinstance(bills[0], dict):
+            return bills[0]
+    return None
+
+
+def _bill_type(bill_data, form):
+    raw = str(bill_data.get("bill_type") or (form or {}).get("billType") or "").strip().lower()
+    if raw == "tou":
+        return "TOU"
+    if raw == "tiered":
+        return "Tiered"
+    if raw in ("flat", "ulo", "flat/ulo"):
+        return "Flat/ULO"
+    return "TOU"  # most common Ontario plan
+
+
+def _usage_and_rates(bill_data, bill_type, form):
+    """Monthly kWh per period plus $/kWh rates, from parsed fields or the form's kWh totals and rates."""
+    # (period, parsed kWh field, parsed rate field, form field prefix)
+    if bill_type == "TOU":
+        periods = [("on", "Peak_kWh", "Peak_Rate", "peak"), ("mid", "MidPeak_kWh", "MidPeak_Rate", "midPeak"),
+                   ("off", "OffPeak_kWh", "OffPeak_Rate", "offPeak")]
+        defaults = TOU_RATES
+    elif bill_type == "Tiered":
+        periods = [("lower", "Tier1_kWh", "Tier1_Rate", "tier1"), ("upper", "Tier2_kWh", "Tier2_Rate", "tier2")]
+        defaults = TIERED_RATES
+    else:
+        periods = [("flat", "Total_kWh", "Rate", "flat")]
+        defaults = {"flat": FLAT_RATE}
+
+    kwh, rates = {}, {}
+    for period, kwh_field, rate_field, field in periods:
+        rate = _num(bill_data.get(rate_field))
+        if rate is None and form:
+            rate = _num(form.get(f"{field}Rate"))
+        # Some bills print rates in cents; work in dollars
+        if rate is not None and rate > 2:
+            rate = rate / 100
+        rates[period] = rate or defaults[period]
+
+        usage = _num(bill_data.get(kwh_field))
+        if usage is None and form:
+            usage = _num(form.get(f"{field}Total"))
+        kwh[period] = usage or 0.0
+    return kwh, rates
+
+
+def _bill_total(bill_data, kwh, rates):
+    """The bill's Total_Cost, else energy cost priced from the usage (no fixed charges)."""
+    total = _num(bill_data.get("Total_Cost"))
+    if total is None:
+        total = sum(kwh[period] * rates[period] for period in kwh)
+    return total or DEFAULT_BILL
+
+
+def _residents(bill_data, form):
+    home = bill_data.get("homeInfo") if isinstance(bill_data.get("homeInfo"), dict) else {}
+    people = (_num(home.get("adults")) or 0) + (_num(home.get("children")) or 0)
+    if not people:
+        people = _num((form or {}).get("residents")) or _num(bill_data.get("residents")) or 0
+    return int(people) or None
+
+
+def _money(value):
+    return f"${max(1, round(value))}/month"
+
+
+def _bill_type_tip(bill_type, kwh, rates, month):
+    if bill_type == "TOU":
+        shifted = 0.2 * (kwh["on"] + kwh["mid"]) or 60
+        savings = shifted * (rates["on"] - rates["off"])
+        return savings, {
+            "title": "Shift chores to off-peak",
+            "savings": _money(savings),
+            "description": "Run laundry and the dishwasher after 7 pm or on weekends.",
+            "cost": "$0",
+            "payback": "Immediate",
+            "category": "TOU",
+        }
+    if bill_type == "Tiered":
+        threshold = 1000 if month in WINTER_MONTHS else 600
+        over = kwh["upper"] or max(0.0, kwh["lower"] - threshold)
+        cut = min(over, 100) or 50
+        savings = cut * rates["upper"]
+        return savings, {
+            "title": "Stay under the lower tier",
+            "savings": _money(savings),
+            "description": f"Keep monthly use under {threshold} kWh to pay only the lower price.",
+            "cost": "$0",
+            "payback": "Immediate",
+            "category": "Tiered",
+        }
+    savings = 0.1 * (kwh["flat"] or DEFAULT_USAGE) * rates["flat"]
+    return savings, {
+        "title": "Cut always-on power",
+        "savings": _money(savings),
+        "description": "Unplug idle electronics and use smart power bars.",
+        "cost": "$20 upfront",
+        "payback": "3 months",
+        "category": "Flat/ULO",
+    }
+
+
+def _personal_tip(residents, usage, bill):
+    per_kwh = bill / usage if usage else 0.15
+    if residents and residents >= 3:
+        savings = 40 * per_kwh
+        return savings, {
+            "title": "Wash clothes in cold water",
+            "savings": _money(savings),
+            "description": "Bigger households do more laundry; cold cycles skip water heating.",
+            "cost": "$0",
+            "payback": "Immediate",
+            "category": "Personal",
+        }
+    savings = 25 * per_kwh
+    return savings, {
+        "title": "Switch to LED bulbs",
+        "savings": _money(savings),
+        "description": "Replace your most used bulbs with LEDs.",
+        "cost": "$30 upfront",
+        "payback": f"{max(1, round(30 / max(savings, 1)))} months",
+        "category": "Personal",
+    }
+
+
+def _combined_tip(bill_type, usage, bill):
+    per_kwh = bill / usage if usage else 0.15
+    savings = 0.05 * usage * per_kwh
+    timing = "before peak hours" if bill_type == "TOU" else "when nobody is home"
+    return savings, {
+        "title": "Use a smart thermostat schedule",
+        "savings": _money(savings),
+        "description": f"Pre-heat or pre-cool {timing} and lower the setting overnight.",
+        "cost": "$150 upfront",
+        "payback": f"{max(1, round(150 / max(savings, 1)))} months",
+        "category": "Combined",
+    }
+
+
+def _efficiency_score(usage, residents):
+    # Roughly 250 kWh per person plus a 250 kWh base is typical for an Ontario home
+    typical = 250 * (residents or 2) + 250
+    ratio = usage / typical if typical else 1
+    return int(max(10, min(95, round(100 - ratio * 40))))
+
+
+def local_advice(bill_data):
+    """Schema-valid advice for `bill_data`, computed locally (no network)."""
+    bill_data = bill_data if isinstance(bill_data, dict) else {}
+    form = _first_bill(bill_data)
+    bill_type = _bill_type(bill_data, form)
+    month = str(bill_data.get("month") or (form or {}).get("month") or "").strip().lower()
+
+    kwh, rates = _usage_and_rates(bill_data, bill_type, form)
+    usage = sum(kwh.values()) or DEFAULT_USAGE
+    bill = _bill_total(bill_data, kwh, rates)
+    residents = _residents(bill_data, form)
+
+    tips = [
+        _bill_type_tip(bill_type, kwh, rates, month),
+        _personal_tip(residents, usage, bill),
+        _combined_tip(bill_type, usage, bill),
+    ]
+    # Tips overlap, so count a bit less than their sum
+    estimated = int(round(sum(s for s, _ in tips) * 0.8))
+    return {
+        "tips": {
+            "currentUsage": int(round(usage)),
+            "currentBill": round(bill, 2),
+            "estimatedSavings": estimated,
+            "percentageSaving": int(round(estimated / bill * 100)) if bill else 0,
+            "efficiencyScore": _efficiency_score(usage, residents),
+            "tips": [tip for _, tip in tips],
+        },
+        "subsidies": [dict(s) for s in SUBSIDIES],
+    }
@@ -0,0 +1,129 @@
+import time
+import bisect
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# Seconds; covers regex parsing (sub-ms) up to slow OCR / LLM calls
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+PAGE_BUCKETS = (1, 2, 3, 5, 10, 20, 50)
+SIZE_BUCKETS = (500, 1000, 2500, 5000, 10000, 25000, 50000, 100000, 250000)
+TOKEN_BUCKETS = (50, 100, 200, 400, 800, 1600, 3200, 6400)
+
+
+def _fmt_labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, values)) + "}"
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_fmt_labels(self.labels, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.setdefault(label_values, [0] * (len(self.buckets) + 2))
+            if i < len(self.buckets):
+                series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    labels = _fmt_labels(self.labels + ("le",), key + (bound,))
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _fmt_labels(self.labels + ("le",), key + ("+Inf",))
+                lines.append(f"{self.name}_bucket{labels} {series[-1]}")
+                lines.append(f"{self.name}_sum{_fmt_labels(self.labels, key)} {series[-2]}")
+                lines.append(f"{self.name}_count{_fmt_labels(self.labels, key)} {series[-1]}")
+        return lines
+
+
+STAGE_SECONDS = Histogram(
+    "savewatt_stage_seconds", "Latency of pipeline stages (extract, ocr, parse, model_load, predict, llm).",
+    labels=("stage",),
+)
+REQUEST_SECONDS = Histogram(
+    "savewatt_request_seconds", "HTTP request latency by endpoint.", labels=("endpoint", "status"),
+)
+PDF_PAGES = Histogram("savewatt_pdf_pages", "Pages opened per PDF.", labels=("source",), buckets=PAGE_BUCKETS)
+TEXT_CHARS = Histogram("savewatt_text_chars", "Characters of bill text per document.",
+                       labels=("source",), buckets=SIZE_BUCKETS)
+ADVICE_FIRST_TIP_SECONDS = Histogram(
+    "savewatt_advice_first_tip_seconds", "Time from /advice/stream request to its first tip.",
+    labels=("source",),
+)
+ADVICE_FALLBACKS = Counter("savewatt_advice_fallbacks_total", "Advice answered locally after an LLM error or timeout.")
+LLM_TOKENS = Histogram("savewatt_llm_tokens", "Gemini tokens per call (prompt, response, cached, thoughts).",
+                       labels=("kind",), buckets=TOKEN_BUCKETS)
+CACHE_REQUESTS = Counter("savewatt_cache_requests_total", "Cache lookups by result.", labels=("cache", "result"))
+
+METRICS = [STAGE_SECONDS, REQUEST_SECONDS, PDF_PAGES, TEXT_CHARS, ADVICE_FIRST_TIP_SECONDS, ADVICE_FALLBACKS, LLM_TOKENS,
+           CACHE_REQUESTS]
+
+# Per-request list of (stage, ms) spans, set by the Flask hooks in routes.py
+_spans = contextvars.ContextVar("stage_spans", default=None)
+
+
+def start_request_profile():
+    _spans.set([])
+
+
+def request_profile():
+    return _spans.get() or []
+
+
+def record_stage(stage, elapsed):
+    """Adds `elapsed` seconds of `stage` to savewatt_stage_seconds and the current request's breakdown."""
+    STAGE_SECONDS.observe(elapsed, stage)
+    spans = _spans.get()
+    if spans is not None:
+        spans.append((stage, round(elapsed * 1000, 2)))
+
+
+@contextmanager
+def stage_timer(stage):
+    """Times a block into savewatt_stage_seconds and the current request's breakdown."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - start)
+
+
+def render_prometheus(extra_gauges=()):
+    """Prometheus text exposition format; `extra_gauges` are (name, help, value) tuples."""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    for name, help, value in extra_gauges:
+        lines += [f"# HELP {name} {help}", f"# TYPE {name} gauge", f"{name} {value}"]
+    return "\n".join(lines) + "\n"
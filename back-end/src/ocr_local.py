@@ -1,9 +1,39 @@
 import io
-from PIL import Image, ImageOps
-import pytesseract
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from .metrics import PDF_PAGES, TEXT_CHARS, stage_timer
+
+# PIL, pdfplumber and pytesseract are imported on first OCR, not with the app
+
+# Scanned-PDF defaults (env overrides)
+OCR_DPI = int(os.getenv("OCR_DPI", "200"))
+OCR_MAX_WIDTH = int(os.getenv("OCR_MAX_WIDTH", "1700"))
+# Pool size per process. Each gunicorn worker has its own pool, so serve.py
+# splits the CPUs between workers; the hard default keeps the dev server sane.
+OCR_PROCESSES = int(os.getenv("OCR_PROCESSES", str(min(4, os.cpu_count() or 2))))
+# Pools are created lazily inside threaded web workers, where fork is unsafe
+OCR_START_METHOD = os.getenv(
+    "OCR_START_METHOD",
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn",
+)
+
+class InvalidPDF(ValueError):
+    """The upload could not be opened as a PDF."""
+
+def _tesseract():
+    import pytesseract
+    # Respect a custom Tesseract binary (also in worker processes started with spawn)
+    if os.getenv("TESSERACT_CMD"):
+        pytesseract.pytesseract.tesseract_cmd = os.getenv("TESSERACT_CMD")
+    return pytesseract
 
 def ocr_to_text(image_input, lang="eng", psm=6, oem=3, whitelist=None):
     """Return plain text from an image (path/bytes/BytesIO/file-like/PIL.Image)."""
+    from PIL import Image, ImageOps
+
     if isinstance(image_input, Image.Image):
         img = image_input
     elif isinstance(image_input, (bytes, bytearray)):
@@ -28,4 +58,152 @@ def ocr_to_text(image_input, lang="eng", psm=6, oem=3, whitelist=None):
         # keep without extra quotes to avoid shell-escaping issues on some platforms
         config += f" -c tessedit_char_whitelist={whitelist}"
 
-    return pytesseract.image_to_string(img, lang=lang, config=config).strip()
+    return _tesseract().image_to_string(img, lang=lang, config=config).strip()
+
+def _otsu_threshold(img):
+    """Global threshold that best separates ink from paper (grayscale image)."""
+    hist = img.histogram()
+    total = sum(hist)
+    sum_all = sum(i * h for i, h in enumerate(hist))
+    sum_bg, weight_bg, best, threshold = 0.0, 0, 0.0, 127
+    for i, h in enumerate(hist):
+        weight_bg += h
+        if weight_bg == 0:
+            continue
+        weight_fg = total - weight_bg
+        if weight_fg == 0:
+            break
+        sum_bg += i * h
+        mean_bg = sum_bg / weight_bg
+        mean_fg = (sum_all - sum_bg) / weight_fg
+        between = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+        if between > best:
+            best, threshold = between, i
+    return threshold
+
+def preprocess(img, max_width=OCR_MAX_WIDTH, margin=10):
+    """
+    Grayscale -> downscale to `max_width` -> binarize (Otsu) -> crop to the ink.
+    Smaller, two-tone images OCR noticeably faster with the same accuracy.
+    """
+    from PIL import Image, ImageOps
+
+    img = ImageOps.exif_transpose(img).convert("L")
+    if img.width > max_width:
+        img = img.resize((max_width, round(img.height * max_width / img.width)), Image.LANCZOS)
+
+    threshold = _otsu_threshold(img)
+    img = img.point(lambda p: 255 if p > threshold else 0)
+
+    bbox = ImageOps.invert(img).getbbox()
+    if bbox:
+        left, top, right, bottom = bbox
+        img = img.crop((max(left - margin, 0), max(top - margin, 0),
+                        min(right + margin, img.width), min(bottom + margin, img.height)))
+    return img
+
+def _ocr_image_with_confidence(img, lang, psm, oem):
+    """One Tesseract call -> (text with line breaks, mean word confidence 0-100)."""
+    pytesseract = _tesseract()
+    data = pytesseract.image_to_data(
+        img, lang=lang, config=f"--oem {oem} --psm {psm}", output_type=pytesseract.Output.DICT
+    )
+    lines, confs = {}, []
+    for i, word in enumerate(data["text"]):
+        if not word.strip():
+            continue
+        key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        lines.setdefault(key, []).append(word)
+        conf = float(data["conf"][i])
+        if conf >= 0:
+            confs.append(conf)
+    text = "\n".join(" ".join(words) for words in lines.values())
+    return text, (round(sum(confs) / len(confs), 1) if confs else 0.0)
+
+def _ocr_pdf_range(pdf_bytes, start, stop, dpi, lang, psm, oem):
+    """Worker: open the PDF once, then rasterize, preprocess and OCR pages [start, stop)."""
+    import pdfplumber
+
+    results = []
+    try:
+        with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+            for index in range(start, stop):
+                page = pdf.pages[index]
+                img = page.to_image(resolution=dpi).original
+                page.flush_cache()
+                text, confidence = _ocr_image_with_confidence(preprocess(img), lang, psm, oem)
+                results.append({"page": index + 1, "text": text, "confidence": confidence})
+    except Exception as e:
+        # Some errors (e.g. TesseractNotFoundError) do not unpickle and would break the pool
+        raise RuntimeError(f"{type(e).__name__}: {e}") from None
+    return results
+
+def _page_ranges(n_pages, parts):
+    """Splits range(n_pages) into `parts` contiguous, near-equal (start, stop) ranges."""
+    parts = max(1, min(parts, n_pages))
+    size, extra = divmod(n_pages, parts)
+    ranges, start = [], 0
+    for i in range(parts):
+        stop = start + size + (1 if i < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=OCR_PROCESSES,
+                                        mp_context=multiprocessing.get_context(OCR_START_METHOD))
+        return _pool
+
+def _read_bytes(source):
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source)
+    if hasattr(source, "read"):
+        try:
+            source.seek(0)
+        except Exception:
+            pass
+        return source.read()
+    with open(str(source), "rb") as f:
+        return f.read()
+
+def ocr_pdf(source, dpi=OCR_DPI, lang="eng", psm=6, oem=3, max_pages=None, parallel=True):
+    """
+    OCR a scanned PDF (path/bytes/file-like). Pages are rasterized at `dpi`,
+    preprocessed and recognized in parallel across a process pool, one
+    contiguous page range per process. Raises InvalidPDF if `source` cannot be
+    read or is not a PDF.
+    Returns [{"page": n, "text": str, "confidence": float}] in page order.
+    """
+    import pdfplumber
+
+    with stage_timer("ocr"):
+        try:
+            pdf_bytes = _read_bytes(source)
+            with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+                n_pages = len(pdf.pages)
+        except Exception as e:
+            raise InvalidPDF(f"Not a readable PDF: {e}") from e
+        if max_pages is not None:
+            n_pages = min(n_pages, max_pages)
+
+        if not parallel or n_pages <= 1:
+            pages = _ocr_pdf_range(pdf_bytes, 0, n_pages, dpi, lang, psm, oem)
+        else:
+            # One contiguous range per pool process: the PDF is sent and opened once per range
+            futures = [_get_pool().submit(_ocr_pdf_range, pdf_bytes, start, stop, dpi, lang, psm, oem)
+                       for start, stop in _page_ranges(n_pages, OCR_PROCESSES)]
+            pages = [page for future in futures for page in future.result()]
+
+    PDF_PAGES.observe(n_pages, "ocr")
+    TEXT_CHARS.observe(sum(len(p["text"]) for p in pages), "ocr")
+    return pages
+
+def ocr_pdf_to_text(source, **kwargs):
+    """Plain text of a scanned PDF, pages joined like extract_text_from_pdf."""
+    return "".join(page["text"] + "\n" for page in ocr_pdf(source, **kwargs)).strip()
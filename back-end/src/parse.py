@@ -1,68 +1,239 @@
 # parse.py
-import pdfplumber 
+import os
+import json
+import logging
 import re # helps search for patterns
+import time
+from datetime import datetime
+
+from .metrics import PDF_PAGES, TEXT_CHARS, record_stage, stage_timer
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever parsing output changes so cached /analyze results are invalidated
+PARSER_VERSION = "4"
+
+# Fields that must be found before we stop reading pages, per bill type.
+# Billing_Period is optional: it sits in the first-page header, read before any stop.
+REQUIRED_FIELDS = {
+    "TOU": ["Peak_kWh", "OffPeak_kWh", "MidPeak_kWh", "Total_Cost"],
+    "Tiered": ["Tier1_kWh", "Tier2_kWh", "Total_Cost"],
+    "Flat/ULO": ["Total_kWh", "Total_Cost"],
+}
+
+# Max pages to open per PDF (unset = no limit)
+PAGE_BUDGET = int(os.getenv("PDF_PAGE_BUDGET")) if os.getenv("PDF_PAGE_BUDGET") else None
+
+def iter_pdf_pages(source, max_pages=None):
+    """
+    Yields the text of each page (path or file-like), one page at a time.
+    Pages without a text layer yield "". Stops after `max_pages` pages.
+    """
+    import pdfplumber  # deferred so importing the app stays fast
 
-# Function to extract text from PDF
-def extract_text_from_pdf(file_path):
-    text = ""
     try:
-        with pdfplumber.open(file_path) as pdf:
-            for page in pdf.pages:
-                text += page.extract_text() + "\n"
-    except Exception:
-        print("Error reading PDF file.")
-   
-    return text
+        with pdfplumber.open(source) as pdf:
+            for i, page in enumerate(pdf.pages):
+                if max_pages is not None and i >= max_pages:
+                    break
+                yield page.extract_text() or ""
+                page.flush_cache()  # drop cached layout objects as we go
+    except Exception as e:
+        logger.warning("Error reading PDF file: %s", e)
 
-def parse_bill_data(text):
-    bill_data = {} 
-    print("Parsing text:", text[:1000])  # Debug: print first 1000 characters of text
-    if "Time-of-Use" in text or "Peak" in text or "Time of use" in text: 
-        bill_data["bill_type"] = "TOU"
-        peak = peak = re.search(r"Peak.*?([\d,.]+)\s?kWh", text)
-        off_peak = re.search(r"Off[- ]Peak.*?([\d,.]+)\s?kWh", text)
-        mid_peak = re.search(r"Mid[- ]Peak.*?([\d,.]+)\s?kWh", text)
-        bill_data["Peak_kWh"] = float(peak.group(1).replace(",", "")) if peak else 0
-        bill_data["OffPeak_kWh"] = float(off_peak.group(1).replace(",", "")) if off_peak else 0
-        bill_data["MidPeak_kWh"] = float(mid_peak.group(1).replace(",", "")) if mid_peak else 0
-        # --- Rate Extraction ---
-        peak_rate = re.search(r"Peak.*?([\d,.]+)\s?(?:\$|¢)?/?kWh", text, re.IGNORECASE)
-        off_rate = re.search(r"Off[- ]Peak.*?([\d,.]+)\s?(?:\$|¢)?/?kWh", text, re.IGNORECASE)
-        mid_rate = re.search(r"Mid[- ]Peak.*?([\d,.]+)\s?(?:\$|¢)?/?kWh", text, re.IGNORECASE)
-
-        bill_data["Peak_Rate"] = peak_rate.group(1) if peak_rate else None
-        bill_data["OffPeak_Rate"] = off_rate.group(1) if off_rate else None
-        bill_data["MidPeak_Rate"] = mid_rate.group(1) if mid_rate else None
-    elif "Tier 1" in text and "Tier 2" in text:
-        bill_data["bill_type"] = "Tiered"
-        tier1 = re.search(r"Tier 1.*?([\d,.]+)\s?kWh", text)
-        tier2 = re.search(r"Tier 2.*?([\d,.]+)\s?kWh", text)
-        bill_data["Tier1_kWh"] = float(tier1.group(1).replace(",", "")) if tier1 else 0
-        bill_data["Tier2_kWh"] = float(tier2.group(1).replace(",", "")) if tier2 else 0
-        # --- Rate Extraction ---
-        tier1_rate = re.search(r"Tier 1.*?([\d,.]+)\s?(?:\$|¢)?/?kWh", text, re.IGNORECASE)
-        tier2_rate = re.search(r"Tier 2.*?([\d,.]+)\s?(?:\$|¢)?/?kWh", text, re.IGNORECASE)
-
-        bill_data["Tier1_Rate"] = tier1_rate.group(1) if tier1_rate else None
-        bill_data["Tier2_Rate"] = tier2_rate.group(1) if tier2_rate else None
-
-    elif "Total Usage" in text:
-        bill_data["bill_type"] = "Flat/ULO"
-        total = re.search(r"Total Usage.*?([\d,.]+)\s?kWh", text)
-        bill_data["Total_kWh"] = float(total.group(1).replace(",", "")) if total else 0
-        # --- Rate Extraction ---
-        flat_rate = re.search(r"([\d,.]+)\s?(?:\$|¢)?/?kWh", text, re.IGNORECASE)
-        bill_data["Rate"] = flat_rate.group(1) if flat_rate else None
-    else: 
-        # if none of the expected keywords are not found, return invalid 
-        return {"error": "Invalid PDF: Could not detect a valid electricity bill."}
-    
-    cost = re.search(r"Total Amount Due[:\s\$]*([\d,.]+)", text)
-    bill_data["Total_Cost"] = float(cost.group(1).replace(",", "")) if cost else None
+# Function to extract text from PDF
+def extract_text_from_pdf(file_path, max_pages=None):
+    return "".join(text + "\n" for text in iter_pdf_pages(file_path, max_pages))
+
+def is_complete(bill_data):
+    """
+    True once every required field for the detected bill type has a value.
+    A parsed 0 (e.g. Tier2_kWh) counts: pass the fields found, without defaults.
+    """
+    required = REQUIRED_FIELDS.get(bill_data.get("bill_type"))
+    if not required:
+        return False
+    return all(bill_data.get(field) is not None for field in required)
+
+def extract_bill_data_from_pdf(source, page_budget=PAGE_BUDGET):
+    """
+    Streams pages and parses each new page once: the layout is detected from
+    the keywords seen so far, then each page's fields are scanned and the first
+    value found per field is kept. Stops as soon as all required fields for the
+    bill type are found (or the budget runs out). Time spent pulling pages from
+    pdfplumber is recorded as "extract", regex work as "parse".
+    Returns (text_read, bill_data, pages_read); bill_data is None if no text was found.
+    """
+    pages = []
+    seen = set()  # detection keywords found so far
+    layout = None
+    found = {}
+    extract_s = parse_s = 0.0
+    pages_iter = iter_pdf_pages(source, page_budget)
+    while True:
+        start = time.perf_counter()
+        page_text = next(pages_iter, None)
+        extract_s += time.perf_counter() - start
+        if page_text is None:
+            break
+        pages.append(page_text)
+        if not page_text.strip():
+            continue
+
+        start = time.perf_counter()
+        if layout is None:
+            seen.update(k for k in DETECT_KEYWORDS if k in page_text)
+            layout = _match_layout(seen.__contains__)
+            # Pages read before the layout was known are scanned once, now
+            backlog = pages if layout is not None else []
+        else:
+            backlog = [page_text]
+        for text in backlog:
+            _scan_fields(text, layout, found)
+        complete = layout is not None and is_complete({"bill_type": layout["bill_type"], **found})
+        parse_s += time.perf_counter() - start
+        if complete:
+            pages_iter.close()
+            break
+
+    record_stage("extract", extract_s)
+    record_stage("parse", parse_s)
+    text = "".join(p + "\n" for p in pages)
+    PDF_PAGES.observe(len(pages), "text")
+    TEXT_CHARS.observe(len(text), "text")
+    if not text.strip():
+        return "", None, len(pages)
+    if layout is None:
+        return text, {"error": "Invalid PDF: Could not detect a valid electricity bill."}, len(pages)
+    return text, _bill_from_fields(layout, found), len(pages)
+
+# Field definitions live in bill_layouts.json so a new utility's labels can be
+# added without touching code (BILL_LAYOUTS_PATH points at an alternative file)
+LAYOUTS_PATH = os.getenv("BILL_LAYOUTS_PATH", os.path.join(os.path.dirname(__file__), "bill_layouts.json"))
+
+DATE_FORMATS = ["%b %d, %Y", "%B %d, %Y", "%b %d %Y", "%B %d %Y", "%d %b %Y", "%d %B %Y",
+                "%Y-%m-%d", "%m/%d/%Y", "%Y/%m/%d"]
+
+def _parse_date(text):
+    text = text.strip().replace("Sept ", "Sep ")
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+def parse_period(text):
+    """
+    "Jan 01, 2025 - Jan 31, 2025" -> {"start": "2025-01-01", "end": "2025-01-31"};
+    None unless both ends are dates and the period runs forward.
+    """
+    parts = re.split(r"\s+(?:-|–|—|to)\s+", text, maxsplit=1)
+    if len(parts) != 2:
+        return None
+    start, end = (_parse_date(part) for part in parts)
+    if start is None or end is None or end < start:
+        return None
+    return {"start": start.isoformat(), "end": end.isoformat()}
+
+# kind of value -> (converter, default when missing)
+VALUE_TYPES = {
+    "kwh": (lambda s: float(s.replace(",", "")), 0),
+    "rate": (lambda s: s, None),
+    "rate_before": (lambda s: s, None),
+    "money": (lambda s: float(s.replace(",", "")), None),
+    "period": (parse_period, None),
+}
+
+def _compile_layout(layout, values, common_fields):
+    """
+    Builds one alternation of every field label for a bill type. The master
+    pattern has no groups so `re` can skip ahead on the labels' first characters;
+    fields sharing a label (kWh + rate) are resolved from the same hit.
+    """
+    labels = {}  # label regex -> [(field name, value regex, kind, value precedes label)]
+    for field in layout["fields"] + common_fields:
+        labels.setdefault(field["label"], []).append(
+            (field["name"], re.compile(values[field["value"]]), field["value"], field.get("before", False))
+        )
+    return {
+        "bill_type": layout["bill_type"],
+        "detect_any": layout.get("detect_any", []),
+        "detect_all": layout.get("detect_all", []),
+        "master": re.compile("|".join(labels)),
+        "labels": [(re.compile(label), fields) for label, fields in labels.items()],
+        "fields": [(f[0], f[2]) for fields in labels.values() for f in fields],
+    }
+
+def load_layouts(path=LAYOUTS_PATH):
+    with open(path, encoding="utf-8") as f:
+        spec = json.load(f)
+    return [_compile_layout(layout, spec["values"], spec.get("common_fields", []))
+            for layout in spec["layouts"]]
+
+LAYOUTS = load_layouts()
+DETECT_KEYWORDS = {k for layout in LAYOUTS for k in layout["detect_all"] + layout["detect_any"]}
+
+def _match_layout(contains, layouts=None):
+    """First layout whose detection keywords pass `contains(keyword)`."""
+    for layout in layouts or LAYOUTS:
+        if layout["detect_all"] and all(contains(k) for k in layout["detect_all"]):
+            return layout
+        if layout["detect_any"] and any(contains(k) for k in layout["detect_any"]):
+            return layout
+    return None
+
+def detect_layout(text, layouts=None):
+    return _match_layout(text.__contains__, layouts)
+
+def _scan_fields(text, layout, found):
+    """
+    One pass over `text`: each label hit tries its value patterns on the rest of
+    that line (or the part before the label for "before" fields). Fields already
+    in `found` are kept (first value wins); scanning stops once every field is found.
+    """
+    total = len(layout["fields"])
+    if len(found) >= total:
+        return found
+    for m in layout["master"].finditer(text):
+        # Alternation is leftmost-first, so the first label matching here is the hit
+        fields = next(f for label, f in layout["labels"] if label.match(text, m.start()))
+        for name, value_re, kind, before in fields:
+            if name in found:
+                continue
+            if before:
+                line_start = text.rfind("\n", 0, m.start()) + 1
+                value = value_re.search(text, line_start, m.start())
+            else:
+                line_end = text.find("\n", m.end())
+                value = value_re.match(text, m.end(), line_end if line_end != -1 else len(text))
+            if value:
+                found[name] = VALUE_TYPES[kind][0](value.group(1))
+        if len(found) >= total:
+            break
+    return found
+
+def _bill_from_fields(layout, found):
+    bill_data = {"bill_type": layout["bill_type"]}
+    bill_data.update({name: found.get(name, VALUE_TYPES[kind][1]) for name, kind in layout["fields"]})
 
     # Additional validation: if key usage fields are all zero, treat as invalid
     usage_values = [v for k, v in bill_data.items() if "_kWh" in k]
     if all(val == 0 for val in usage_values):
         return {"error": "Invalid PDF: No electricity usage data found."}
-    
-    return bill_data
\ No newline at end of file
+
+    return bill_data
+
+def parse_bill_data(text):
+    with stage_timer("parse"):
+        return _parse_bill_data(text)
+
+def _parse_bill_data(text):
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Parsing text: %s", text[:1000])
+    layout = detect_layout(text)
+    if layout is None:
+        # if none of the expected keywords are not found, return invalid 
+        return {"error": "Invalid PDF: Could not detect a valid electricity bill."}
+
+    return _bill_from_fields(layout, _scan_fields(text, layout, {}))
@@ -1,20 +1,61 @@
-import os
-from werkzeug.utils import secure_filename
-from flask import Blueprint, jsonify, request
-from pathlib import Path
+import json
+import time
+import logging
+from flask import Blueprint, Response, g, jsonify, request, stream_with_context
 
-from .gemini import call_gemini_api
-from .parse import extract_text_from_pdf, parse_bill_data
-from .ocr_local import ocr_to_text
+from .advice_cache import advice_service
+from .advice_stream import sse_format
+from .parse import PARSER_VERSION, extract_bill_data_from_pdf, parse_bill_data
+from .ocr_local import InvalidPDF, ocr_pdf_to_text
+from .ML_model.callthemodel import ML_total_what_if, predict_batch
+from .cache import analyze_cache
+from .uploads import UploadTooLarge, read_upload
+from .metrics import REQUEST_SECONDS, render_prometheus, request_profile, start_request_profile
+from .jobs import job_manager, sse_stream, tou_score
+from .history import billing_month, history_store, household_key, parse_month, record_analysis, WINDOW
+from . import warmup
 
 
 
 bp = Blueprint("main", __name__)
+logger = logging.getLogger(__name__)
+
+@bp.before_app_request
+def _start_timing():
+    g.request_start = time.perf_counter()
+    start_request_profile()
+
+@bp.after_app_request
+def _record_timing(response):
+    elapsed = time.perf_counter() - g.get("request_start", time.perf_counter())
+    REQUEST_SECONDS.observe(elapsed, request.endpoint or "unknown", response.status_code)
+
+    # Opt-in stage breakdown: send "X-Profile: 1"
+    if request.headers.get("X-Profile") == "1":
+        spans = request_profile()
+        response.headers["Server-Timing"] = ", ".join(
+            [f"{stage};dur={ms}" for stage, ms in spans] + [f"total;dur={round(elapsed * 1000, 2)}"]
+        )
+        response.headers["X-Stage-Timings"] = json.dumps(
+            {"total_ms": round(elapsed * 1000, 2), "stages": [{"stage": s, "ms": ms} for s, ms in spans]}
+        )
+    return response
 
 @bp.get("/")
 def root():
     return jsonify({"ok": True})
 
+@bp.get("/ready")
+def ready():
+    """
+    200 once the required warm-up steps have completed (see warmup.warm_up),
+    503 before that. If nothing was warmed at startup (PRELOAD_MODELS=0), the
+    first call starts the warm-up in the background.
+    """
+    if not warmup.state["ready"]:
+        warmup.warm_up_in_background()
+    return jsonify(warmup.state), (200 if warmup.state["ready"] else 503)
+
 
 @bp.post("/analyze")
 def analyze():
@@ -23,6 +64,9 @@ def analyze():
     - multipart/form-data with 'file' (PDF)
     - application/json with { "file_path": "..."} or manual fields later
     Returns parsed bill fields (kWh, bill_type, Total_Cost, etc.)
+
+    With ?mode=job (uploads only) returns 202 + job id right away and runs
+    extract/OCR/parse/predict/advice in the background; poll /jobs/<id>.
     """
     # 1) File upload path (preferred for demo)
     if "file" in request.files:
@@ -30,48 +74,218 @@ def analyze():
         if file.filename == "":
             return jsonify({"error": "No file selected"}), 400
 
-        # Save to a temp path
-        fname = secure_filename(file.filename)
-        tmp_dir = os.path.join(os.getcwd(), "tmp")
-        os.makedirs(tmp_dir, exist_ok=True)
-        fpath = os.path.join(tmp_dir, fname)
-        file.save(fpath)
+        try:
+            upload, digest, _ = read_upload(file)
+        except UploadTooLarge as e:
+            return jsonify({"error": str(e)}), 413
 
-        text = extract_text_from_pdf(fpath)
-        if text == "":
-            text = ocr_to_text(file.read(), psm=6)
+        if request.args.get("mode") == "job":
+            fields = {k: v for k, v in request.form.items()}
+            job = job_manager.submit(upload, digest, fields)
+            return jsonify({
+                "job_id": job.id,
+                "status_url": f"/jobs/{job.id}",
+                "events_url": f"/jobs/{job.id}/events",
+            }), 202
+
+        # Same bytes + same parser version -> same result, skip extraction/OCR
+        with upload:
+            cache_key = f"{PARSER_VERSION}:{digest}"
+            cached = analyze_cache.get(cache_key)
+            if cached is not None:
+                _record_history(cached["bill_data"], request.form)
+                return jsonify(cached["bill_data"])
+
+            # The in-memory (or spooled) buffer goes straight to pdfplumber / OCR
+            text, bill_data, _ = extract_bill_data_from_pdf(upload)
+            if text == "":
+                try:
+                    text = ocr_pdf_to_text(upload, psm=6)
+                except InvalidPDF as e:
+                    return jsonify({"error": str(e)}), 400
+                bill_data = parse_bill_data(text)
 
-        bill_data = parse_bill_data(text)
-            
+        analyze_cache.set(cache_key, {"text": text, "bill_data": bill_data})
+
+        _record_history(bill_data, request.form)
         return jsonify(bill_data)
 
     # 2) JSON path (optional helper)
     data = request.get_json(silent=True) or {}
     file_path = data.get("file_path")
     if file_path:
-        text = extract_text_from_pdf(file_path)
-        print(text[:1000])  # Debug: print first 1000 characters of extracted text
+        text, bill_data, _ = extract_bill_data_from_pdf(file_path)
         if text == "":
-            print("OCRing PDF as fallback...")
-            text = ocr_to_text(file_path, psm=6)
-        bill_data = parse_bill_data(text)
+            logger.info("No text layer in %s, OCRing PDF as fallback", file_path)
+            try:
+                text = ocr_pdf_to_text(file_path, psm=6)
+            except InvalidPDF as e:
+                return jsonify({"error": str(e)}), 400
+            bill_data = parse_bill_data(text)
+        _record_history(bill_data, data)
         return jsonify(bill_data)
 
     return jsonify({"error": "Send a PDF as 'file' (multipart) or provide 'file_path' in JSON."}), 400
 
+def _record_history(bill_data, fields):
+    """Stores the parsed bill (and its TOU score) when the form names a household and the month is known."""
+    if (history_store is None or "error" in bill_data or household_key(fields) is None
+            or billing_month(bill_data, fields) is None):
+        return
+    try:
+        score = tou_score(bill_data, fields)
+    except Exception:
+        logger.exception("ML_total failed; storing bill history without a score")
+        score = None
+    record_analysis(bill_data, fields, score)
+
+@bp.get("/history")
+def history():
+    """
+    Dashboard data for one household: ?household= (the id sent with uploads) returns its
+    rolling 12-month aggregates (usage, cost, peak share, $/kWh) and latest
+    bills. Optional: months (bills to list, default 12, max 120),
+    bill_type, from / to ("YYYY-MM") to list a month range.
+    """
+    if history_store is None:
+        return jsonify({"error": "Bill history is disabled (HISTORY_DB is empty)"}), 404
+    household = household_key(request.args)
+    if household is None:
+        return jsonify({"error": "Provide ?household="}), 400
+
+    start, end = request.args.get("from"), request.args.get("to")
+    bounds = [parse_month(v) if v else None for v in (start, end)]
+    if any(v and b is None for v, b in zip((start, end), bounds)):
+        return jsonify({"error": "from / to must look like YYYY-MM"}), 400
+    try:
+        months = max(1, min(int(request.args.get("months", WINDOW)), 120))
+    except ValueError:
+        return jsonify({"error": "months must be an integer"}), 400
+
+    rollup = history_store.rollup(household)
+    if rollup is None:
+        return jsonify({"error": "No bills stored for this household"}), 404
+    bills = history_store.bills(household, bill_type=request.args.get("bill_type"),
+                                start=bounds[0], end=bounds[1], limit=months)
+    return jsonify({"household": household, "rollup": rollup, "bills": bills})
+
+@bp.get("/jobs/<job_id>")
+def job_status(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job id"}), 404
+    return jsonify(job.to_dict())
+
+@bp.get("/jobs/<job_id>/events")
+def job_events(job_id):
+    """Server-sent events: each stage's result as soon as it is ready."""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job id"}), 404
+    return Response(
+        stream_with_context(sse_stream(job)),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@bp.get("/metrics")
+def metrics():
+    """Prometheus text format: stage latencies, page/text sizes, cache hit rates."""
+    gauges = [
+        ("savewatt_analyze_cache_hit_ratio", "Hit ratio of the /analyze result cache.",
+         analyze_cache.stats()["hit_rate"]),
+        ("savewatt_advice_cache_hit_ratio", "Hit ratio of the /advice cache.",
+         advice_service.stats()["hit_rate"]),
+    ]
+    return Response(render_prometheus(gauges), mimetype="text/plain; version=0.0.4")
+
+@bp.get("/cache/stats")
+def cache_stats():
+    """Hit/miss counters for the /analyze and /advice caches."""
+    return jsonify({"analyze": analyze_cache.stats(), "advice": advice_service.stats()})
+
 @bp.post("/advice")
 def advice():
     """
     Expects JSON: { ...bill_data... } (typically the output of /analyze)
-    Returns LLM-generated tips/subsidy guidance.
+    Returns tips/subsidy guidance and its source: "llm", "cache" or "local"
+    (rule-based, used when the LLM errors or misses ADVICE_DEADLINE).
     """
     bill_data = request.get_json(silent=True) or {}
     if not bill_data or not isinstance(bill_data, dict):
         return jsonify({"error": "Provide bill_data JSON"}), 400
 
-    text = call_gemini_api(bill_data)
-    
-    return jsonify({"advice": text})
+    advice, source = advice_service.get_advice_with_source(bill_data)
+
+    return jsonify({"advice": advice, "source": source})
+
+@bp.post("/advice/stream")
+def advice_stream():
+    """
+    Same input as /advice, answered as server-sent events while the LLM writes:
+    `local` (rule-based advice to show right away), `tip` and `subsidy` per
+    completed object, then `summary`, then `done`
+    ({"advice": full JSON, "source": "llm" | "cache" | "local"}).
+    Read it with fetch() and a stream reader (EventSource cannot POST).
+    """
+    bill_data = request.get_json(silent=True) or {}
+    if not bill_data or not isinstance(bill_data, dict):
+        return jsonify({"error": "Provide bill_data JSON"}), 400
 
+    events = (sse_format(event, payload) for event, payload in advice_service.stream_advice(bill_data))
+    return Response(
+        stream_with_context(events),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
+@bp.post("/predict/batch")
+def predict_batch_route():
+    """
+    Scores many households in one call. Accepts EITHER:
+    - application/json: a list of rows, or { "rows": [...] }
+    - multipart/form-data with 'file' (.csv or .parquet)
+    Rows use the training-data columns (Billing_Type, Month, Postal_Code, ...).
+    Returns predictions in input order (null for unknown Billing_Type).
+    """
+    if "file" in request.files:
+        file = request.files["file"]
+        name = (file.filename or "").lower()
+        import pandas as pd
+        try:
+            if name.endswith(".parquet"):
+                rows = pd.read_parquet(file.stream)
+            else:
+                rows = pd.read_csv(file.stream)
+        except Exception as e:
+            return jsonify({"error": f"Could not read batch file: {e}"}), 400
+    else:
+        data = request.get_json(silent=True)
+        rows = data.get("rows") if isinstance(data, dict) else data
+        if not isinstance(rows, list):
+            return jsonify({"error": "Send a list of rows as JSON or a CSV/Parquet 'file'."}), 400
+
+    start = time.perf_counter()
+    predictions = predict_batch(rows)
+    elapsed = time.perf_counter() - start
+
+    return jsonify({
+        "predictions": [None if p != p else float(p) for p in predictions],
+        "count": len(predictions),
+        "rows_per_sec": round(len(predictions) / elapsed, 1) if elapsed > 0 else None,
+    })
+
+
+@bp.post("/predict/what-if")
+def predict_what_if_route():
+    """
+    Expects JSON: one frontend bill dict (month, zipCode, residents, homeSize,
+    peakTotal, midPeakTotal, offPeakTotal). Returns the ML_total score, served
+    from the precomputed grid when possible ("source": "grid" or "model").
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Provide the what-if inputs as a JSON object"}), 400
+    score, source = ML_total_what_if(data)
+    return jsonify({"score": score, "source": source})
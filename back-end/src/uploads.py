@@ -0,0 +1,66 @@
+import io
+import os
+import hashlib
+import tempfile
+from flask import Request
+
+# Uploads stay in memory up to this size, then spill to an anonymous temp file
+UPLOAD_SPOOL_BYTES = int(os.getenv("UPLOAD_SPOOL_BYTES", str(8 * 1024 * 1024)))
+# Hard cap per uploaded file (also enforced for the whole request in app.py)
+MAX_UPLOAD_BYTES = int(float(os.getenv("MAX_UPLOAD_MB", "20")) * 1024 * 1024)
+
+CHUNK_SIZE = 64 * 1024
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class SpooledRequest(Request):
+    """Werkzeug spills multipart files over 500 KB to disk; keep them in memory up to our threshold."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_BYTES)
+
+
+def _seekable(stream):
+    try:
+        return stream.seekable()
+    except Exception:
+        return False
+
+
+def read_upload(file_storage, spool_max=UPLOAD_SPOOL_BYTES, max_bytes=MAX_UPLOAD_BYTES):
+    """
+    Hashes an uploaded file in place. SpooledRequest already buffers it in a
+    SpooledTemporaryFile, so that stream is rewound and handed over as is
+    (only a non-seekable stream is copied into a new spooled buffer).
+    Returns (buffer positioned at 0, sha256 hex digest, size in bytes).
+    The caller owns the buffer and should close it: it is detached from the
+    request, so it outlives request teardown (e.g. for background jobs).
+    """
+    stream = file_storage.stream
+    copy = None if _seekable(stream) else tempfile.SpooledTemporaryFile(max_size=spool_max)
+    if copy is None:
+        stream.seek(0)
+    digest = hashlib.sha256()
+    size = 0
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > max_bytes:
+            if copy is not None:
+                copy.close()
+            raise UploadTooLarge(f"Upload exceeds {max_bytes // (1024 * 1024)} MB")
+        digest.update(chunk)
+        if copy is not None:
+            copy.write(chunk)
+    if copy is not None:
+        copy.seek(0)
+        return copy, digest.hexdigest(), size
+    stream.seek(0)
+    # Werkzeug closes every request file at teardown; give it an empty stand-in to close instead
+    file_storage.stream = io.BytesIO()
+    return stream, digest.hexdigest(), size
@@ -0,0 +1,89 @@
+import os
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Readiness as reported by GET /ready; filled in by warm_up()
+state = {"ready": False, "checks": {}, "seconds": None}
+_lock = threading.Lock()
+_background = None
+
+
+def _check(name, fn):
+    start = time.perf_counter()
+    try:
+        detail = fn()
+        state["checks"][name] = {"ok": True, "ms": round((time.perf_counter() - start) * 1000, 1)}
+        if detail is not None:
+            state["checks"][name]["detail"] = detail
+    except Exception as e:
+        state["checks"][name] = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        logger.warning("Warm-up step %s failed: %s", name, e)
+
+
+def _models():
+    from .ML_model.registry import preload_models
+    from .ML_model.callthemodel import predict_batch
+
+    preload_models()
+    # One prediction pays for CatBoost/pandas lazy initialisation before any request does
+    predict_batch([{"Billing_Type": "TOU", "Month": "January", "Postal_Code": "M5V"}])
+    return None
+
+
+def _surrogates():
+    from .ML_model.surrogate import GRID_SPECS, get_surrogate
+    return sorted(name for name in GRID_SPECS if get_surrogate(name) is not None)
+
+
+def _ocr():
+    # Only resolve the binary here; the OCR process pool is created lazily in each worker
+    from .ocr_local import _tesseract
+    return str(_tesseract().get_tesseract_version())
+
+
+def _llm():
+    from . import gemini
+    if os.getenv("LLM_FAKE") == "1":
+        from .fake_llm import FakeGenerativeModel
+        gemini.set_client(FakeGenerativeModel(latency=float(os.getenv("LLM_FAKE_LATENCY", "0"))))
+        return "fake"
+    if not gemini.GEMINI_API_KEY:
+        raise RuntimeError("GEMINI_API_KEY is not set")
+    # Builds the model object only; its network channel is opened on first use, after fork
+    gemini.get_client()
+    return gemini.GEMINI_MODEL
+
+
+# Steps that must pass before /ready reports OK; the rest only degrade features
+REQUIRED = {"models"}
+STEPS = {"models": _models, "surrogates": _surrogates, "ocr": _ocr, "llm": _llm}
+
+
+def warm_up(steps=None):
+    """
+    Loads models, what-if grids and the OCR/LLM clients so the first request is
+    served warm. Safe to call more than once; returns the readiness state.
+    """
+    with _lock:
+        start = time.perf_counter()
+        for name in steps or STEPS:
+            _check(name, STEPS[name])
+        state["seconds"] = round(time.perf_counter() - start, 2)
+        state["ready"] = all(state["checks"].get(name, {}).get("ok") for name in REQUIRED)
+        logger.info("Warm-up finished in %.2fs (ready=%s)", state["seconds"], state["ready"])
+    return state
+
+
+def warm_up_in_background():
+    """
+    Starts warm_up() once in a daemon thread (for PRELOAD_MODELS=0, where
+    nothing was warmed at startup); /ready stays 503 until it has finished.
+    """
+    global _background
+    with _lock:
+        if _background is None and not state["ready"]:
+            _background = threading.Thread(target=warm_up, name="warm-up", daemon=True)
+            _background.start()
@@ -139,6 +139,16 @@ export function BillUpload({ onAnalyze }: BillUploadProps) {
     } 
   };
 
+  // Stable per-browser id, so the backend can keep this household's bill history
+  const householdId = () => {
+    let id = localStorage.getItem("householdId");
+    if (!id) {
+      id = crypto.randomUUID();
+      localStorage.setItem("householdId", id);
+    }
+    return id;
+  };
+
   const handleFileSubmit = async () => {
     if (selectedFiles.length > 0) {
       try {
@@ -148,6 +158,7 @@ export function BillUpload({ onAnalyze }: BillUploadProps) {
         Object.entries(commonInfo).forEach(([key, value]) => {
           formData.append(key, value);
         });
+        formData.append("household", householdId());
 
         const response = await fetch("http://localhost:5000/analyze", {
           method: "POST",
@@ -499,20 +510,20 @@ export function BillUpload({ onAnalyze }: BillUploadProps) {
                             <div>
                               <Label className="text-xs mb-1 block">Peak Rate ($/kWh)</Label>
                               <Input placeholder="0.20" value={bill.peakRate} onChange={(e) => updateMonthlyBill(bill.id, 'peakRate', e.target.value)} className="text-gray-600"/>
-                              <Label className="text-xs mb-1 block mt-2">Peak Total ($)</Label>
-                              <Input placeholder="50" value={bill.peakTotal} onChange={(e) => updateMonthlyBill(bill.id, 'peakTotal', e.target.value)} className="text-gray-600"/>
+                              <Label className="text-xs mb-1 block mt-2">Peak Total (kWh)</Label>
+                              <Input placeholder="180" value={bill.peakTotal} onChange={(e) => updateMonthlyBill(bill.id, 'peakTotal', e.target.value)} className="text-gray-600"/>
                             </div>
                             <div>
                               <Label className="text-xs mb-1 block">Off-Peak Rate ($/kWh)</Label>
                               <Input placeholder="0.10" value={bill.offPeakRate} onChange={(e) => updateMonthlyBill(bill.id, 'offPeakRate', e.target.value)} className="text-gray-600"/>
-                              <Label className="text-xs mb-1 block mt-2">Off-Peak Total ($)</Label>
-                              <Input placeholder="30" value={bill.offPeakTotal} onChange={(e) => updateMonthlyBill(bill.id, 'offPeakTotal', e.target.value)} className="text-gray-600"/>
+                              <Label className="text-xs mb-1 block mt-2">Off-Peak Total (kWh)</Label>
+                              <Input placeholder="500" value={bill.offPeakTotal} onChange={(e) => updateMonthlyBill(bill.id, 'offPeakTotal', e.target.value)} className="text-gray-600"/>
                             </div>
                             <div>
                               <Label className="text-xs mb-1 block">Mid-Peak Rate ($/kWh)</Label>
                               <Input placeholder="0.15" value={bill.midPeakRate} onChange={(e) => updateMonthlyBill(bill.id, 'midPeakRate', e.target.value)} className="text-gray-600"/>
-                              <Label className="text-xs mb-1 block mt-2">Mid-Peak Total ($)</Label>
-                              <Input placeholder="40" value={bill.midPeakTotal} onChange={(e) => updateMonthlyBill(bill.id, 'midPeakTotal', e.target.value)} className="text-gray-600"/>
+                              <Label className="text-xs mb-1 block mt-2">Mid-Peak Total (kWh)</Label>
+                              <Input placeholder="170" value={bill.midPeakTotal} onChange={(e) => updateMonthlyBill(bill.id, 'midPeakTotal', e.target.value)} className="text-gray-600"/>
                             </div>
                           </div>
                         </div>
@@ -525,14 +536,14 @@ export function BillUpload({ onAnalyze }: BillUploadProps) {
                             <div>
                               <Label className="text-xs mb-1 block">Tier 1 Rate ($/kWh)</Label>
                               <Input placeholder="0.12" value={bill.tier1Rate} onChange={(e) => updateMonthlyBill(bill.id, 'tier1Rate', e.target.value)} className="text-gray-600"/>
-                              <Label className="text-xs mb-1 block mt-2">Tier 1 Total ($)</Label>
-                              <Input placeholder="42" value={bill.tier1Total} onChange={(e) => updateMonthlyBill(bill.id, 'tier1Total', e.target.value)} className="text-gray-600"/>
+                              <Label className="text-xs mb-1 block mt-2">Tier 1 Total (kWh)</Label>
+                              <Input placeholder="600" value={bill.tier1Total} onChange={(e) => updateMonthlyBill(bill.id, 'tier1Total', e.target.value)} className="text-gray-600"/>
                             </div>
                             <div>
                               <Label className="text-xs mb-1 block">Tier 2 Rate ($/kWh)</Label>
                               <Input placeholder="0.18" value={bill.tier2Rate} onChange={(e) => updateMonthlyBill(bill.id, 'tier2Rate', e.target.value)} className="text-gray-600"/>
-                              <Label className="text-xs mb-1 block mt-2">Tier 2 Total ($)</Label>
-                              <Input placeholder="60" value={bill.tier2Total} onChange={(e) => updateMonthlyBill(bill.id, 'tier2Total', e.target.value)} className="text-gray-600"/>
+                              <Label className="text-xs mb-1 block mt-2">Tier 2 Total (kWh)</Label>
+                              <Input placeholder="250" value={bill.tier2Total} onChange={(e) => updateMonthlyBill(bill.id, 'tier2Total', e.target.value)} className="text-gray-600"/>
                             </div>
                           </div>
                         </div>
@@ -547,8 +558,8 @@ export function BillUpload({ onAnalyze }: BillUploadProps) {
                               <Input placeholder="0.15" value={bill.flatRate} onChange={(e) => updateMonthlyBill(bill.id, 'flatRate', e.target.value)} className="text-gray-600"/>
                             </div>
                             <div>
-                              <Label className="text-xs mb-1 block">Total ($)</Label>
-                              <Input placeholder="85" value={bill.flatTotal} onChange={(e) => updateMonthlyBill(bill.id, 'flatTotal', e.target.value)} className="text-gray-600"/>
+                              <Label className="text-xs mb-1 block">Total (kWh)</Label>
+                              <Input placeholder="750" value={bill.flatTotal} onChange={(e) => updateMonthlyBill(bill.id, 'flatTotal', e.target.value)} className="text-gray-600"/>
                             </div>
                           </div>
                         </div>